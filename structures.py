@@ -2,53 +2,310 @@
     # This file will contain varying data structures in python
 
 ##### Importing libraries
+import array
+import asyncio
+import bisect
 import ctypes
-from typing import Any, Generator, Optional
+import functools
+import hashlib
+import heapq
+import mmap
+import operator
+import os
+import pickle
+import queue
+import struct
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice, repeat
+from multiprocessing import shared_memory
+from typing import Any, Generator, Optional, Union
+try:
+    import numpy as np  # Optional, used for bulk paths when installed
+except ImportError:
+    np = None
 
 ##### C-style array
+#### Typed storage
+    # dtype code -> (ctypes element type, python type, struct format)
+    # Typed arrays store raw machine values instead of boxed py_objects
+    # Zero-copy access for numpy/struct/array: arr.as_memoryview(), on every
+        # python version. memoryview(arr) / numpy.asarray(arr) only work on
+        # python 3.12+, the first version that honours __buffer__
+_DTYPES = {
+    'i1': (ctypes.c_int8, int, 'b'),
+    'i2': (ctypes.c_int16, int, 'h'),
+    'i4': (ctypes.c_int32, int, 'i'),
+    'i8': (ctypes.c_int64, int, 'q'),
+    'u1': (ctypes.c_uint8, int, 'B'),
+    'u2': (ctypes.c_uint16, int, 'H'),
+    'u4': (ctypes.c_uint32, int, 'I'),
+    'u8': (ctypes.c_uint64, int, 'Q'),
+    'f4': (ctypes.c_float, float, 'f'),
+    'f8': (ctypes.c_double, float, 'd'),
+}
+_FORMAT_KINDS = {
+    # struct format character -> kind, matching the first letter of a dtype
+    **dict.fromkeys('bhilqn', 'i'), **dict.fromkeys('BHILQN', 'u'), **dict.fromkeys('efd', 'f'),
+}
+_NATIVE_ORDER = '<' if sys.byteorder == 'little' else '>'
+
+def _split_format(fmt: str) -> tuple:
+    # Buffer format -> (byte order prefix, format character), '@' when unprefixed
+    if fmt[:1] in ('@', '=', '<', '>', '!'): return fmt[0], fmt[1:]
+    return '@', fmt
+
+_INT_RANGES = {
+    # dtype code -> (smallest, largest) storable value; ctypes wraps anything else
+    dtype: ((-1 << (8 * ctypes.sizeof(ctype) - 1), (1 << (8 * ctypes.sizeof(ctype) - 1)) - 1)
+            if dtype[0] == 'i' else (0, (1 << (8 * ctypes.sizeof(ctype))) - 1))
+    for dtype, (ctype, pytype, _) in _DTYPES.items() if pytype is int
+}
+
 class CArray:
-    def __init__(self, size: int) -> None:
+    def __init__(self, size: int, dtype: Optional[str] = None) -> None:
         if size < 0: 
             raise ValueError("Size needs to be positive")
+        if dtype is not None and dtype not in _DTYPES:
+            raise ValueError(f"Unknown dtype {dtype!r}")
         self._size = size
-        self._data = (ctypes.py_object * self._size)()
-        self._type: Optional[type] = None
-        self.clear()
+        self._dtype = dtype
+        if dtype is None:
+            self._data = (ctypes.py_object * self._size)()
+            self._type: Optional[type] = None
+            self.clear()
+        else:
+            ctype, self._type, _ = _DTYPES[dtype]
+            self._data = (ctype * self._size)()
+                # ctypes zero-fills new buffers, so no clear() needed
 
     def clear(self, value: Optional[Any] = None) -> None:
         if self._type is not None and \
         value is not None and\
         not isinstance(value, self._type):
             raise TypeError(f"{self._type} not  {type(value)}")
-        for i in range(self._size):
-            self._data[i] = value
+        if self._dtype is not None and value is None:
+            value = 0   # Typed arrays can't hold None, so "empty" means zeroed
+        if self._dtype in _INT_RANGES: self._check_range(value, value)
+        self._fill(value, 0, self._size)
     
     def __len__(self) -> int:
         return self._size
     
     def __contains__(self, value: Any) -> bool:
-        for item in self._data:
-            if item == value:
-                return True
-        return False
+        return self.index_of(value) != -1
     
     def _check_index(self, index: int) -> None:
         if not 0 <= index < self._size:
             raise IndexError("Index out of range")
-        
-    def __getitem__(self, index: int) -> Any:
-        self._check_index(index)
-        return self._data[index]
-    
-    def __setitem__(self, index: int, value: Any) -> None:
+
+    def _check_value(self, value: Any) -> None:
+        # Same rule as __setitem__: first non-None value fixes the type
         if self._type is None and\
         value is not None:
             self._type = type(value)
         elif value is not None and not isinstance(value, self._type):
             raise TypeError(f"{self._type} not {type(value)}")
+        if value is not None and self._dtype in _INT_RANGES: self._check_range(value, value)
+
+    def _check_range(self, smallest: int, largest: int) -> None:
+        # Like array.array: refuse ints the dtype can't hold instead of wrapping them
+        low, high = _INT_RANGES[self._dtype]
+        if smallest < low or largest > high:
+            bad = smallest if smallest < low else largest
+            raise OverflowError(f"{bad} out of range for dtype {self._dtype}")
+
+    def _check_values(self, values: list) -> None:
+        # Batch version of _check_value
+            # set(map(type, ...)) runs in C, instead of one isinstance per item
+        types = set(map(type, values))
+        if self._dtype is None: types.discard(type(None))
+        if not types: return
+        if self._type is None:
+            self._type = type(next(v for v in values if v is not None))
+        for t in types:
+            if not issubclass(t, self._type):
+                raise TypeError(f"{self._type} not {t}")
+        if values and self._dtype in _INT_RANGES: self._check_range(min(values), max(values))
+
+    def _range(self, start: int, stop: Optional[int]) -> tuple:
+        # Clamp [start, stop) the same way slicing does
+        start, stop, _ = slice(start, stop).indices(self._size)
+        return start, max(start, stop)
+
+    def _address(self, index: int) -> int:
+        return ctypes.addressof(self._data) + index * self.itemsize()
+
+    def _view(self, start: int, stop: int) -> "CArray":
+        ## Typed slice that shares this array's memory (no copy)
+        view = CArray.__new__(CArray)
+        view._size = stop - start
+        view._dtype = self._dtype
+        view._type = self._type
+        view._data = (self._data._type_ * view._size).from_buffer(
+            self._data, start * self.itemsize())
+        return view
+
+    def _copy(self, index: slice) -> "CArray":
+        ## Slice copied into a new array
+            # Used for stepped slices and for untyped arrays, whose
+            # py_object slots can't be shared safely between two arrays
+        values = self._data[index]  # ctypes slicing builds the list in C
+        result = CArray(len(values), self._dtype)
+        result._type = self._type
+        result._data[:] = values
+        return result
+        
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._size)
+            if step == 1 and self._dtype is not None:
+                return self._view(start, max(start, stop))
+            return self._copy(slice(start, stop, step))
+        self._check_index(index)
+        return self._data[index]
+    
+    def __setitem__(self, index: Union[int, slice], value: Any) -> None:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._size)
+            if step == 1:
+                stop = max(start, stop)
+                if len(value) != stop - start:
+                    raise ValueError("CArray slices can't change size")
+                self.copy_from(value, start)
+                return
+            values = list(value)
+            self._check_values(values)
+            self._data[start:stop:step] = values    # Raises on size mismatch
+            return
+        self._check_value(value)
         self._check_index(index)
         self._data[index] = value
 
+    #### Bulk operations
+        # Each one is a single C-level call (memset/memmove, ctypes slice
+        # assignment, operator.indexOf...) instead of a Python loop
+    def fill(self, value: Any, start: int = 0, stop: Optional[int] = None) -> None:
+        ## Set every slot in [start, stop) to "value"
+        start, stop = self._range(start, stop)
+        if start == stop: return
+        self._check_value(value)
+        self._fill(value, start, stop)
+
+    def _fill(self, value: Any, start: int, stop: int) -> None:
+        n = stop - start
+        if self._dtype is None:
+            self._data[start:stop] = [value] * n
+            return
+        width = self.itemsize()
+        base = self._address(start)
+        self._data[start] = value
+        if not any(ctypes.string_at(base, width)):
+            ctypes.memset(base, 0, n * width)    # All-zero bytes, e.g. clear()
+            return
+        done = 1
+        while done < n:
+            # Double the filled prefix each time: O(log n) memmoves
+            chunk = min(done, n - done)
+            ctypes.memmove(base + done * width, base, chunk * width)
+            done += chunk
+
+    def copy_from(self, source: Any, start: int = 0) -> None:
+        ## Overwrite slots starting at "start" with the items of "source"
+            # source: CArray, buffer (bytes, array.array, memoryview...) or iterable
+        if isinstance(source, CArray):
+            n = len(source)
+            self._check_fits(start, n)
+            if self._dtype is not None and source._dtype == self._dtype:
+                # Same machine type: one memmove (safe for overlapping views)
+                ctypes.memmove(self._address(start), source._address(0),
+                               n * self.itemsize())
+                return
+            values = source._data[:]
+        elif self._dtype is not None and not isinstance(source, (list, tuple)):
+            try:
+                buffer = memoryview(source)
+            except TypeError:
+                values = list(source)
+            else:
+                self._copy_buffer(buffer, start)
+                return
+        else:
+            values = list(source)
+        n = len(values)
+        self._check_fits(start, n)
+        self._check_values(values)
+        self._data[start:start + n] = values
+
+    def _check_fits(self, start: int, n: int) -> None:
+        if start < 0 or start + n > self._size:
+            raise IndexError("Index out of range")
+
+    def _copy_buffer(self, buffer: memoryview, start: int) -> None:
+        # Raw copy when the buffer holds the same machine values: native byte
+            # order, same kind (signed/unsigned/float) and itemsize, so 'l' and
+            # 'q' match on 64-bit Linux; plain bytes are copied raw as well
+        # Anything else numeric (other widths, non-native byte order) is
+            # decoded with struct and goes through the usual type/range checks
+        width = self.itemsize()
+        order, kind = _split_format(buffer.format)
+        native = order in ('@', '=') or order == _NATIVE_ORDER
+        if native and kind in ('B', 'b', 'c') and buffer.nbytes % width == 0:
+            raw = buffer.cast('B') if buffer.ndim == 1 else memoryview(buffer.tobytes())
+        elif native and _FORMAT_KINDS.get(kind) == self._dtype[0] and buffer.itemsize == width:
+            raw = buffer.cast('B') if buffer.ndim == 1 else memoryview(buffer.tobytes())
+        elif kind in _FORMAT_KINDS:
+            n = buffer.nbytes // buffer.itemsize
+            values = list(struct.unpack(f"{order}{n}{kind}", buffer.tobytes()))
+            self._check_fits(start, n)
+            self._check_values(values)
+            self._data[start:start + n] = values
+            return
+        else:
+            raise TypeError(f"Buffer format {buffer.format!r} doesn't match dtype {self._dtype}")
+        n = len(raw) // width
+        self._check_fits(start, n)
+        target = memoryview(self._data).cast('B')
+        target[start * width:(start + n) * width] = raw
+
+    def _region(self, start: int, stop: int) -> Any:
+        # Sequence over [start, stop), without copying whenever possible
+        if start == 0 and stop == self._size: return self._data
+        if self._dtype is not None: return self._view(start, stop)._data
+        return self._data[start:stop]
+
+    def index_of(self, value: Any, start: int = 0, stop: Optional[int] = None) -> int:
+        ## Index of the first slot equal to "value", -1 if there's none
+        start, stop = self._range(start, stop)
+        if start == stop: return -1
+        if self._type is int and self._dtype is not None and isinstance(value, int):
+            # Integer dtypes: search the raw bytes, keeping only aligned hits
+            width = self.itemsize()
+            try:
+                pattern = struct.pack(_DTYPES[self._dtype][2], value)
+            except struct.error:    # Doesn't fit in this dtype
+                return -1
+            raw = ctypes.string_at(self._address(start), (stop - start) * width)
+            pos = raw.find(pattern)
+            while pos != -1 and pos % width:
+                pos = raw.find(pattern, pos - pos % width + width)
+            return -1 if pos == -1 else start + pos // width
+        try:
+            return start + operator.indexOf(self._region(start, stop), value)
+        except ValueError:
+            return -1
+
+    def count(self, value: Any, start: int = 0, stop: Optional[int] = None) -> int:
+        ## Number of slots equal to "value"
+        start, stop = self._range(start, stop)
+        if start == stop: return 0
+        return operator.countOf(self._region(start, stop), value)
+
     def __iter__(self) -> Generator[Any, None, None]:
         yield from self._data
 
@@ -59,12 +316,305 @@ class CArray:
         return f"{self.__class__.__name__} [{', '.join(map(str,self._data))}]"
     
     def __repr__(self) -> str:  # print(repr(x))
-        return f"{self.__class__.__name__} (size = {self._size})"
+        if self._dtype is None:
+            return f"{self.__class__.__name__} (size = {self._size})"
+        return f"{self.__class__.__name__} (size = {self._size}, dtype = {self._dtype})"
+
+    @classmethod
+    def open_mmap(cls, path: str, size: Optional[int] = None, dtype: str = 'i8',
+                  readonly: bool = False) -> "MappedCArray":
+        ## File-backed array, see MappedCArray below
+        return MappedCArray(path, size, dtype, readonly)
+
+    def itemsize(self) -> int:
+        ## Bytes per element (a pointer for untyped arrays)
+        return ctypes.sizeof(self._data._type_)
+
+    def as_memoryview(self) -> memoryview:
+        ## Zero-copy view of the typed buffer, in native struct format
+            # Usable by struct.unpack_from, numpy.frombuffer, array, etc
+        if self._dtype is None:
+            raise TypeError("Only typed arrays expose their buffer")
+        return memoryview(self._data).cast('B').cast(_DTYPES[self._dtype][2])
+
+    def __buffer__(self, flags: int) -> memoryview:
+        # Buffer protocol hook, only used by python 3.12+; before that, pass
+            # arr.as_memoryview() to anything that wants the buffer
+        return self.as_memoryview()
 
 
 ##### Experimenting with CArray
 # arr = CArray(5)
 # print(arr)
+# typed = CArray(5, dtype='i8')
+# typed[0] = 7
+# print(repr(typed), typed.itemsize(), typed.as_memoryview().tolist())
+# typed.fill(3, 1, 4)
+# print(typed, typed[1:3], typed.index_of(3), typed.count(3))
+
+### Benchmarking clear() on a large typed array
+# import timeit
+# big = CArray(10_000_000, dtype='i8')
+# print(timeit.timeit(lambda: big.clear(), number=10) / 10)
+# print(timeit.timeit(lambda: big.fill(7), number=10) / 10)
+
+
+
+
+
+##### Dynamic array
+    # Growable array on top of CArray
+    # When it's full, allocate a CArray "growth_factor" times bigger and copy once
+        # Copies happen at sizes c, c*g, c*g^2... => append is amortized O(1)
+class DynamicArray:
+    def __init__(self, capacity: int = 0, dtype: Optional[str] = None,
+                 growth_factor: float = 2.0) -> None:
+        if growth_factor <= 1:
+            raise ValueError("Growth factor needs to be greater than 1")
+        self._dtype = dtype
+        self._growth = growth_factor
+        self._length = 0
+        self._array = CArray(capacity, dtype)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def capacity(self) -> int:
+        return len(self._array)
+
+    def _resize(self, capacity: int) -> None:
+        ## Move the items into a new CArray of "capacity" slots
+        new_array = CArray(capacity, self._dtype)
+        new_array._type = self._array._type
+        if self._length:
+            new_array.copy_from(self._array[:self._length])
+        self._array = new_array
+
+    def _grow(self, needed: int) -> None:
+        self._resize(max(needed, int(self.capacity() * self._growth), 4))
+
+    def reserve(self, n: int) -> None:
+        ## Make room for at least n items with a single allocation
+        if n > self.capacity():
+            self._resize(n)
+
+    def shrink_to_fit(self) -> None:
+        ## Release the unused capacity
+        if self.capacity() > self._length:
+            self._resize(self._length)
+
+    def _check_index(self, index: int) -> None:
+        if not 0 <= index < self._length:
+            raise IndexError("Index out of range")
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return self._array[:self._length][index]
+        self._check_index(index)
+        return self._array[index]
+
+    def __setitem__(self, index: int, value: Any) -> None:
+        self._check_index(index)
+        self._array[index] = value
+
+    def append(self, value: Any) -> None:
+        ## Add "value" to the end, growing geometrically when full
+        array = self._array
+        length = self._length
+        if length == array._size:
+            self._grow(length + 1)
+            array = self._array
+        if type(value) is not array._type or array._dtype in _INT_RANGES:
+            array._check_value(value)   # Exact type match needs no further check, except int ranges
+        array._data[length] = value
+            # Index is known to be valid, so skip CArray's bounds check
+        self._length = length + 1
+
+    def extend(self, iterable: Any) -> None:
+        ## Append a batch: at most one resize, then one bulk copy
+        if isinstance(iterable, DynamicArray):
+            values = iterable._array[:iterable._length]
+        elif isinstance(iterable, (CArray, list, tuple)):
+            values = iterable
+        else:
+            values = list(iterable)
+        n = len(values)
+        if self._length + n > self.capacity():
+            self._grow(self._length + n)
+        self._array.copy_from(values, self._length)
+        self._length += n
+
+    def insert(self, index: int, value: Any) -> None:
+        ## Insert "value" before "index", shifting the tail right with one move
+        if not 0 <= index <= self._length:
+            raise IndexError("Index out of range")
+        if self._length == len(self._array):
+            self._grow(self._length + 1)
+        if index < self._length:
+            self._array[index + 1:self._length + 1] = self._array[index:self._length]
+        self._array[index] = value
+        self._length += 1
+
+    def pop(self, index: Optional[int] = None) -> Any:
+        ## Remove and return the item at "index" (last item by default)
+        if not self._length:
+            raise IndexError("Pop from empty array")
+        if index is None: index = self._length - 1
+        self._check_index(index)
+        value = self._array[index]
+        if index < self._length - 1:
+            self._array[index:self._length - 1] = self._array[index + 1:self._length]
+        self._length -= 1
+        if self._dtype is None:
+            self._array[self._length] = None    # Don't keep popped objects alive
+        return value
+
+    def __contains__(self, value: Any) -> bool:
+        return self._array.index_of(value, 0, self._length) != -1
+
+    def __iter__(self) -> Generator[Any, None, None]:
+        yield from islice(self._array, self._length)
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__} [{', '.join(map(str, self))}]"
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__} (size = {self._length}, capacity = {self.capacity()})"
+
+
+##### Experimenting with DynamicArray
+# darr = DynamicArray(dtype='i8')
+# for i in range(10): darr.append(i)
+# darr.insert(0, -1)
+# darr.pop(5)
+# darr.extend(range(3))
+# print(darr, repr(darr))
+
+### Benchmarking append against list
+# import timeit
+# def fill_dynamic():
+#     darr = DynamicArray(dtype='i8')
+#     for i in range(1_000_000): darr.append(i)
+# def fill_list():
+#     lst = []
+#     for i in range(1_000_000): lst.append(i)
+# print("DynamicArray", timeit.timeit(fill_dynamic, number=3) / 3)
+# print("list        ", timeit.timeit(fill_list, number=3) / 3)
+
+
+
+
+
+##### Memory-mapped array
+    # CArray whose typed buffer lives in a file instead of the heap
+    # The OS loads pages lazily => opening is O(1), there is no clear() pass
+        # New files are grown with ftruncate, which reads back as zeros
+    # Read-only maps are copy-on-write views of the page cache
+        # => several processes can open the same file with zero copies
+class MappedCArray(CArray):
+    def __init__(self, path: str, size: Optional[int] = None, dtype: str = 'i8',
+                 readonly: bool = False) -> None:
+        if dtype not in _DTYPES:
+            raise ValueError(f"Unknown dtype {dtype!r}")
+                # Untyped py_object slots can't live in a file
+        ctype, self._type, _ = _DTYPES[dtype]
+        width = ctypes.sizeof(ctype)
+        self._path = path
+        self._dtype = dtype
+        self._readonly = readonly
+        fd = os.open(path, os.O_RDONLY if readonly else os.O_RDWR | os.O_CREAT)
+        try:
+            file_size = os.fstat(fd).st_size
+            if size is None: size = file_size // width
+            if size < 0:
+                raise ValueError("Size needs to be positive")
+            if size * width > file_size:
+                if readonly:
+                    raise ValueError(f"{path} holds fewer than {size} items")
+                os.ftruncate(fd, size * width)
+            self._size = size
+            self._mmap = None
+            if size:    # mmap can't map 0 bytes
+                access = mmap.ACCESS_COPY if readonly else mmap.ACCESS_WRITE
+                self._mmap = mmap.mmap(fd, size * width, access=access)
+        finally:
+            os.close(fd)    # The map keeps its own reference to the file
+        if self._mmap is None:
+            self._data = (ctype * 0)()
+        else:
+            self._data = (ctype * size).from_buffer(self._mmap)
+
+    def _check_writable(self) -> None:
+        if self._readonly:
+            raise TypeError(f"{self._path} is mapped read-only")
+
+    def __setitem__(self, index: Union[int, slice], value: Any) -> None:
+        self._check_writable()
+        super().__setitem__(index, value)
+
+    def clear(self, value: Optional[Any] = None) -> None:
+        self._check_writable()
+        super().clear(value)
+
+    def fill(self, value: Any, start: int = 0, stop: Optional[int] = None) -> None:
+        self._check_writable()
+        super().fill(value, start, stop)
+
+    def copy_from(self, source: Any, start: int = 0) -> None:
+        self._check_writable()
+        super().copy_from(source, start)
+
+    def _view(self, start: int, stop: int) -> CArray:
+        # Views of a read-only map would be writable, so hand out copies
+        if self._readonly:
+            return self._copy(slice(start, stop))
+        return super()._view(start, stop)
+
+    def flush(self) -> None:
+        ## Write dirty pages back to the file
+        if self._mmap is not None and not self._readonly:
+            self._mmap.flush()
+
+    def close(self) -> None:
+        ## Unmap the file (any slice views must be gone by now)
+        if self._mmap is None: return
+        self.flush()
+        data, size = self._data, self._size
+        self._data = (data._type_ * 0)()
+        self._size = 0
+        del data    # Our own ctypes array holds a buffer export too
+        try:
+            self._mmap.close()  # Fails while any slice view still exports the buffer
+        except BufferError:
+            # Put the array back as it was: still open and fully usable
+            self._data = (self._data._type_ * size).from_buffer(self._mmap)
+            self._size = size
+            raise BufferError("Can't close while slice views of the map are alive") from None
+        self._mmap = None
+
+    def __enter__(self) -> "MappedCArray":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __reduce__(self) -> tuple:
+        # Pickling sends the file name, not the data
+            # Worker processes re-map the same file
+        return (self.__class__, (self._path, self._size, self._dtype, self._readonly))
+
+    def __repr__(self) -> str:
+        mode = "r" if self._readonly else "r+"
+        return (f"{self.__class__.__name__} (size = {self._size}, dtype = {self._dtype}, "
+                f"path = {self._path!r}, mode = {mode})")
+
+
+##### Experimenting with MappedCArray
+# with CArray.open_mmap("/tmp/ids.bin", 1_000_000, dtype='u8') as ids:
+#     ids.fill(1, 0, 10)
+#     ids[3] = 42
+# with CArray.open_mmap("/tmp/ids.bin", dtype='u8', readonly=True) as ids:
+#     print(repr(ids), ids[:5])
 
 
 
@@ -88,22 +638,34 @@ class CArray:
 
 ##### Linked Lists 
 #### Creating Node class
-class Node:
+    # Every node type has its own name (ListNode, DoubleNode, TreeNode,
+        # BSTNode, AVLNode), so no section shadows another's at import
+    # Nodes use __slots__: fixed attributes, no per-instance __dict__
+        # => 48 bytes per ListNode instead of 88 (CPython 3.11, see benchmark below)
+class ListNode:
+    __slots__ = ("data", "next")
+
     def __init__(self, data):
         self.data: int = data
-        self.next: Node = None
+        self.next: ListNode = None
 
     def __str__(self):
         return f"({self.data}) -> {self.next}"
 
 ### Experimenting with Node class
-# node = Node(5)
+# node = ListNode(5)
 # print(node)
-    
+
 #### Creating Linked List class
 class LinkedList:
     def __init__(self) -> None:
-        self.head: Node = None
+        self.head: ListNode = None
+        self.tail: ListNode = None
+            # Tracking the tail makes append O(1), no traversal needed
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
 
     def __str__(self) -> str:
         current = self.head
@@ -117,25 +679,45 @@ class LinkedList:
     
     def prepend(self, data) -> None:
         ## Add new node to beginning
-        new_node = Node(data)
+        new_node = ListNode(data)
         new_node.next = self.head
         self.head = new_node
+        if not self.tail:   #LList was empty
+            self.tail = new_node
+        self.size += 1
 
     def append(self, data):
         ## Add new node to end of list
-        new_node = Node(data)
+        new_node = ListNode(data)
         if not self.head:   #LList is empty
-            self.head = new_node
-            return
-        last = self.head    #Start traversing from head
-        while last.next:
-            last = last.next    #Traverse all nodes
-        last.next = new_node    #Add new node to tail, once tail is reached
+            self.head = self.tail = new_node
+        else:
+            self.tail.next = new_node   #Link straight after the tail
+            self.tail = new_node
+        self.size += 1
+
+    def extend(self, iterable) -> None:
+        ## Append a whole batch of values
+            # The new nodes are chained together first
+            # Then the chain is linked to the tail only once
+        first = last = None
+        count = 0
+        for data in iterable:
+            new_node = ListNode(data)
+            if last: last.next = new_node
+            else: first = new_node
+            last = new_node
+            count += 1
+        if not first: return    #Empty batch
+        if self.tail: self.tail.next = first
+        else: self.head = first
+        self.tail = last
+        self.size += count
 
     def delete_first(self, value) -> None:
         ## Eliminate the first node with "value"
-        current: Node = self.head     #Where to start traversal
-        prev: Node = None     # Keep track of prev node
+        current: ListNode = self.head     #Where to start traversal
+        prev: ListNode = None     # Keep track of prev node
             # Needed in order to connect linked list once target node is cut
         if current and current.data == value:  # Base case on first node
             # Only executes if both following scenarios are true:
@@ -146,6 +728,8 @@ class LinkedList:
                     # Specifically, there is no previous node to keep track of
                 # Due to easiness, it's given it's own edge case
             self.head = current.next
+            if not self.head: self.tail = None  #Removed the only node
+            self.size -= 1
             return
         while current and current.data != value:    #Value hasn't been found yet
             # There are 2 conditions that will BREAK from this while loop:
@@ -157,6 +741,8 @@ class LinkedList:
             print(f"Value {value} is not in linked list")
             return
         prev.next = current.next
+        if current is self.tail: self.tail = prev   #Removed the tail
+        self.size -= 1
 
     def delete_all(self, value) -> None:
         ## Deletes all nodes with "value"
@@ -169,11 +755,14 @@ class LinkedList:
             # while loop breaks only once head does NOT have "Value"
                 # This ensures that many beginner nodes with "value" is checked
             self.head = current = self.head.next
+            self.size -= 1
         while current:  # Traverses all nodes
             # This while loop breaks on either conditions below:
                 # LList is empty
                 # Traversal has reached the tail
-            if current.data == value: prev.next = current.next
+            if current.data == value:
+                prev.next = current.next
+                self.size -= 1
                 # Skip the current node
                 # BUT still keep "prev" node as is
                     # In case there are multiple back-to-back nodes with "value"
@@ -181,13 +770,14 @@ class LinkedList:
                 # Move the prev node the current node and continuje iteration
             current = current.next
                 # Ensures the list will keep on traversing
+        self.tail = prev
+            # "prev" ends on the last node that was kept (None if LList is now empty)
             
         
 
 
 
 
-
 ### Experimenting with Linked List
 # llist = LinkedList()
 # llist.delete_first(5)
@@ -204,7 +794,8 @@ class LinkedList:
 # llist.delete_all(3)
 # llist.delete_first(1)
 # llist.delete_first(2)
-# print(llist)
+# llist.extend([4, 5, 6])
+# print(llist, len(llist), llist.tail.data)
 
 
 
@@ -234,6 +825,8 @@ class LinkedList:
 ##### Doubly linked lists
 #### Create double nodes
 class DoubleNode:
+    __slots__ = ("data", "next", "prev")
+
     def __init__(self, data) -> None:
         self.data: int = data
         self.next: DoubleNode = None
@@ -286,7 +879,7 @@ class DoubleLinkedList:
             i += 1
         return result
 
-    def prepend(self, data) -> None:
+    def prepend(self, data) -> DoubleNode:
         ## Add new DoubleNode at beginning of list
         new_node = DoubleNode(data)
         if not self.head:
@@ -295,16 +888,49 @@ class DoubleLinkedList:
             self.head.prev = new_node
             new_node.next = self.head
             self.head = new_node
+        return new_node
 
-    def append(self, data) -> None:
+    def append(self, data) -> DoubleNode:
         ## Add new DOubleNode at end of list
-        new_node = DoubleNode(data)
+        return self.append_node(DoubleNode(data))
+
+    #### Node-level operations
+        # These take the DoubleNode itself, so no traversal is needed => O(1)
+        # Callers that keep hold of nodes (e.g. caches) can reorder them freely
+    def append_node(self, node: DoubleNode) -> DoubleNode:
+        ## Link an existing, unlinked node at end of list
+        node.next = None
+        node.prev = self.tail
         if not self.tail:
-            self.tail = self.head = new_node
+            self.head = node
         else:
-            self.tail.next = new_node
-            new_node.prev = self.tail
-            self.tail = new_node
+            self.tail.next = node
+        self.tail = node
+        return node
+
+    def insert_after(self, node: DoubleNode, data) -> DoubleNode:
+        ## Add new DoubleNode right after "node"
+        new_node = DoubleNode(data)
+        new_node.prev = node
+        new_node.next = node.next
+        if node.next: node.next.prev = new_node
+        else: self.tail = new_node
+        node.next = new_node
+        return new_node
+
+    def unlink(self, node: DoubleNode) -> None:
+        ## Cut "node" out of the list
+        if node.prev: node.prev.next = node.next
+        else: self.head = node.next     #Node was the head
+        if node.next: node.next.prev = node.prev
+        else: self.tail = node.prev     #Node was the tail
+        node.prev = node.next = None
+
+    def move_to_end(self, node: DoubleNode) -> None:
+        ## Move a node of this list to the end
+        if node is not self.tail:
+            self.unlink(node)
+            self.append_node(node)
 
     def delete_first(self, value) -> None:
         ## Delete first instance of "value"
@@ -449,90 +1075,405 @@ class DoubleLinkedList:
         # The last person can verify the second to last person, etc
     # It also helps if you keep track of the size of the line
         # To allocate more resources, if necessary
-class Node:
-    def __init__(self, data):
-        self.data = data
-        self.next = None
-
+    # Nodes are the same ListNode as in the linked list section
+        # Links run from the front of the line (head) to the back (tail)
+        # => enqueue links after tail, dequeue unlinks head, both O(1)
 class LinkedListQueue:
     def __init__(self):
-        self.head: Node = None
-        self.tail: Node = None
+        self.head: ListNode = None
+        self.tail: ListNode = None
         self.size = 0
 
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        # Front of the line to the back, without dequeuing
+        current = self.head
+        while current:
+            yield current.data
+            current = current.next
+
     def enqueue(self, item):
         # Adds items to the end of the queue
-        new_node = Node(item)
+        new_node = ListNode(item)
         if not self.tail:
             self.head = self.tail = new_node
         else:
-            new_node.next = self.tail
+            self.tail.next = new_node
             self.tail = new_node
         self.size += 1
 
+    def enqueue_many(self, items):
+        # Chains the batch together, then links it to the tail once
+        first = last = None
+        count = 0
+        for item in items:
+            new_node = ListNode(item)
+            if last: last.next = new_node
+            else: first = new_node
+            last = new_node
+            count += 1
+        if not first: return
+        if self.tail: self.tail.next = first
+        else: self.head = first
+        self.tail = last
+        self.size += count
+
     def dequeue(self):
         # Take care of the first node in line
         if not self.head: return None 
             #Line if empty
         data = self.head.data
-        if self.head == self.tail:
-            # THere is only ONE node in list
-            self.head = self.tail = None
-            return data
-        current = self.tail
-        prev = None
-        while current != self.head:
-            # Iterate to see who's next in line
-            prev = current
-            current = current.next
-        self.head = prev
+        self.head = self.head.next
+        if not self.head:
+            # THere was only ONE node in list
+            self.tail = None
         self.size -= 1
         return data
 
+    def dequeue_many(self, k):
+        # Takes up to k items from the front, in order
+        result = []
+        current = self.head
+        while current and len(result) < k:
+            result.append(current.data)
+            current = current.next
+        self.head = current
+        if not current: self.tail = None
+        self.size -= len(result)
+        return result
 
+    def peek(self):
+        # Who's next in line, without removing them
+        return self.head.data if self.head else None
+
+### Experimenting with LinkedListQueue
+# q = LinkedListQueue()
+# q.enqueue(1)
+# q.enqueue_many([2, 3, 4])
+# print(q.dequeue(), q.dequeue_many(2), q.peek(), len(q), list(q))
+
+### Benchmarking a 10M item drain
+# import time
+# q = LinkedListQueue()
+# q.enqueue_many(range(10_000_000))
+# start = time.perf_counter()
+# while q.dequeue_many(10_000): pass
+# print("dequeue_many", time.perf_counter() - start)
+# q.enqueue_many(range(10_000_000))
+# start = time.perf_counter()
+# while q.size: q.dequeue()
+# print("dequeue     ", time.perf_counter() - start)
+
+
+
+
+
+#### Ring buffer queue
+    # Bounded queue stored in a single CArray, with no Node per item
+    # "head" is the index of the front of the line, the back is head + size
+        # Both indices wrap around the end of the array => O(1) enqueue/dequeue
+    # when_full decides what happens to an enqueue on a full line:
+        # "error": raise IndexError
+        # "overwrite": drop the oldest item to make room
+        # "block": wait until a dequeue frees a slot (for producer threads)
+class RingBufferQueue:
+    def __init__(self, capacity, dtype=None, when_full="error"):
+        if capacity <= 0:
+            raise ValueError("Capacity needs to be positive")
+        if when_full not in ("error", "overwrite", "block"):
+            raise ValueError(f"Unknown when_full policy {when_full!r}")
+        self._buffer = CArray(capacity, dtype)
+        self._dtype = dtype
+        self.capacity = capacity
+        self.head = 0
+        self.size = 0
+        self.when_full = when_full
+        self._not_full = threading.Condition() if when_full == "block" else None
+
+    def __len__(self):
+        return self.size
+
+    def is_empty(self): return self.size == 0
+
+    def is_full(self): return self.size == self.capacity
+
+    def __iter__(self):
+        # Front of the line to the back, without dequeuing
+        data = self._buffer._data
+        for i in range(self.size):
+            yield data[(self.head + i) % self.capacity]
+
+    def _make_room(self, n):
+        # Applies the when_full policy so that n more items fit
+            # Only called outside "block" mode
+        free = self.capacity - self.size
+        if n <= free: return
+        if self.when_full == "error":
+            raise IndexError("Queue is full")
+        self._drop(n - free)    # "overwrite": forget the oldest items
+
+    def _drop(self, n):
+        # Removes the n oldest items without returning them
+        self.head = (self.head + n) % self.capacity
+        self.size -= n
+
+    def _push(self, items):
+        # Copies items behind the back of the line, in at most 2 contiguous segments
+        n = len(items)
+        tail = (self.head + self.size) % self.capacity
+        first = min(n, self.capacity - tail)
+        self._buffer[tail:tail + first] = items[:first]
+        if first < n:   # Wrapped around the end of the array
+            self._buffer[0:n - first] = items[first:]
+        self.size += n
+
+    def _pop(self, k):
+        # Copies up to k items off the front, in at most 2 contiguous segments
+        n = min(k, self.size)
+        data = self._buffer._data
+        first = min(n, self.capacity - self.head)
+        result = data[self.head:self.head + first]  # ctypes slices into a list in C
+        if first < n:
+            result.extend(data[0:n - first])
+        if self._dtype is None:
+            # Release the popped objects
+            self._buffer._fill(None, self.head, self.head + first)
+            if first < n: self._buffer._fill(None, 0, n - first)
+        self._drop(n)
+        return result
 
+    def enqueue(self, item, timeout=None):
+        # Adds item to the back of the line
+        if self._not_full is None:
+            if self.size == self.capacity: self._make_room(1)
+            tail = (self.head + self.size) % self.capacity
+            self._buffer[tail] = item
+            self.size += 1
+            return
+        with self._not_full:
+            if not self._not_full.wait_for(self._has_room, timeout):
+                raise IndexError("Queue is full")   # Timed out
+            self._push([item])
+
+    def _has_room(self):
+        return self.size < self.capacity
+
+    def push_many(self, items, timeout=None):
+        # Adds a batch to the back of the line
+        items = list(items)
+        if self._not_full is None:
+            if len(items) > self.capacity:
+                if self.when_full == "error":
+                    raise IndexError("Queue is full")
+                items = items[-self.capacity:]  # Older ones would be overwritten anyway
+            self._make_room(len(items))
+            self._push(items)
+            return
+        with self._not_full:
+            # Blocks piecewise: pushes whatever fits, then waits for more room
+            while items:
+                if not self._not_full.wait_for(self._has_room, timeout):
+                    raise IndexError("Queue is full")
+                free = self.capacity - self.size
+                self._push(items[:free])
+                items = items[free:]
 
+    def dequeue(self):
+        # Takes the front of the line, None if the line is empty
+        if self._not_full is not None:
+            with self._not_full:
+                item = self._dequeue()
+                self._not_full.notify()
+            return item
+        return self._dequeue()
+
+    def _dequeue(self):
+        if not self.size: return None
+        item = self._buffer._data[self.head]
+        if self._dtype is None: self._buffer._data[self.head] = None
+        self.head = (self.head + 1) % self.capacity
+        self.size -= 1
+        return item
+
+    def pop_many(self, k):
+        # Takes up to k items off the front, in order
+        if self._not_full is not None:
+            with self._not_full:
+                result = self._pop(k)
+                self._not_full.notify_all()
+            return result
+        return self._pop(k)
 
+    def peek(self):
+        return self._buffer._data[self.head] if self.size else None
 
+### Experimenting with RingBufferQueue
+# rq = RingBufferQueue(4, dtype='i8', when_full="overwrite")
+# rq.push_many(range(6))
+# rq.enqueue(6)
+# print(list(rq), rq.dequeue(), rq.pop_many(10), len(rq))
 
 
 
+##### Creating Stack DS
+class Stack:
+    def __init__(self): self.items = []
+    def is_empty(self): return self.items == []
+    def push(self, item): self.items.append(item)
+    def pop(self): return "empty" if self.is_empty() else self.items.pop()
+    def peek(self): return "empty" if self.is_empty() else self.items[-1]
+    def size(self): return len(self.items)
+    def __len__(self): return len(self.items)
 
 
 
 
 
+##### Thread-safe and asyncio-aware containers
+    # Same core storage as above (LinkedListQueue / Stack), one lock per container
+        # Every operation on the storage is O(1), so the lock is held very briefly
+    # Threads waiting in get() sleep on a Condition
+    # Coroutines waiting in get() sleep on a future, resolved through
+        # call_soon_threadsafe => producer threads can wake asyncio consumers
+    # Empty containers raise queue.Empty on get_nowait() / timeouts
 
+#### Core storage adapters
+class _QueueStorage:
+    def _new_storage(self): return LinkedListQueue()
+    def _put(self, item): self._items.enqueue(item)
+    def _put_many(self, items): self._items.enqueue_many(items)
+    def _get(self): return self._items.dequeue()
+    def _size(self): return self._items.size
 
+class _StackStorage:
+    def _new_storage(self): return Stack()
+    def _put(self, item): self._items.push(item)
+    def _put_many(self, items): self._items.items.extend(items)
+    def _get(self): return self._items.pop()
+    def _size(self): return self._items.size()
 
+#### Blocking (thread) variant
+class _ConcurrentContainer:
+    def __init__(self):
+        self._items = self._new_storage()
+        self._not_empty = threading.Condition(threading.Lock())
 
+    def __len__(self): return self._size()
 
+    def put(self, item):
+        with self._not_empty:
+            self._put(item)
+            self._not_empty.notify()
 
+    def put_many(self, items):
+        items = list(items)
+        with self._not_empty:
+            self._put_many(items)
+            self._not_empty.notify(len(items))
 
+    def get(self, block=True, timeout=None):
+        # Waits up to "timeout" seconds (forever if None) for an item
+        with self._not_empty:
+            if not self._size():
+                if not block or not self._not_empty.wait_for(self._size, timeout):
+                    raise queue.Empty
+            return self._get()
 
+    def get_nowait(self): return self.get(block=False)
 
+class ConcurrentQueue(_QueueStorage, _ConcurrentContainer): pass
 
+class ConcurrentStack(_StackStorage, _ConcurrentContainer): pass
 
+#### Asyncio variant
+def _wake(future):
+    # Runs on the future's own event loop
+    if not future.done(): future.set_result(None)
 
+class _AsyncContainer:
+    def __init__(self):
+        self._items = self._new_storage()
+        self._lock = threading.Lock()
+        self._waiters = deque()     # (loop, future) per coroutine blocked in get()
 
+    def __len__(self): return self._size()
 
+    def _wake_one(self):
+        # Called with the lock held
+        if self._waiters:
+            loop, future = self._waiters.popleft()
+            loop.call_soon_threadsafe(_wake, future)
 
+    def put_nowait(self, item):
+        # Safe to call from any thread, with or without an event loop
+        with self._lock:
+            self._put(item)
+            self._wake_one()
 
+    async def put(self, item): self.put_nowait(item)
 
+    def put_many(self, items):
+        items = list(items)
+        with self._lock:
+            self._put_many(items)
+            for _ in range(min(len(items), len(self._waiters))): self._wake_one()
 
+    def get_nowait(self):
+        with self._lock:
+            if not self._size(): raise queue.Empty
+            return self._get()
 
+    async def get(self, timeout=None):
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            with self._lock:
+                if self._size(): return self._get()
+                waiter = (loop, loop.create_future())
+                self._waiters.append(waiter)
+            remaining = None if deadline is None else max(0, deadline - loop.time())
+            try:
+                await asyncio.wait_for(waiter[1], remaining)
+            except BaseException as error:
+                with self._lock:
+                    try:
+                        self._waiters.remove(waiter)
+                    except ValueError:
+                        # Already picked by a producer: pass its wakeup on
+                        if self._size(): self._wake_one()
+                if isinstance(error, asyncio.TimeoutError): raise queue.Empty
+                raise
+            # Woken up: loop back, another consumer may have won the item
 
+class AsyncQueue(_QueueStorage, _AsyncContainer): pass
 
+class AsyncStack(_StackStorage, _AsyncContainer): pass
 
+### Experimenting with the concurrent containers
+# cq = ConcurrentQueue()
+# threading.Thread(target=cq.put_many, args=(range(3),)).start()
+# print(cq.get(), cq.get(timeout=1), len(cq))
+# async def consume(aq):
+#     threading.Thread(target=aq.put_nowait, args=("from a thread",)).start()
+#     print(await aq.get(timeout=1))
+# asyncio.run(consume(AsyncStack()))
 
-##### Creating Stack DS
-class Stack:
-    def __init__(self): self.items = []
-    def is_empty(self): return self.items == []
-    def push(self, item): self.items.append(item)
-    def pop(self): return "empty" if self.is_empty() else self.items.pop()
-    def peek(self): return "empty" if self.is_empty() else self.items[-1]
-    def size(self): return len(self.items)
+### Benchmarking contention at 1, 4 and 16 threads
+# import time
+# def contention(container, threads, per_thread=100_000):
+#     def producer():
+#         for i in range(per_thread): container.put(i)
+#     def consumer():
+#         for _ in range(per_thread): container.get()
+#     workers = [threading.Thread(target=f) for _ in range(threads) for f in (producer, consumer)]
+#     start = time.perf_counter()
+#     for w in workers: w.start()
+#     for w in workers: w.join()
+#     return threads * per_thread / (time.perf_counter() - start)
+# for n in (1, 4, 16):
+#     print(n, "threads", int(contention(ConcurrentQueue(), n)), int(contention(ConcurrentStack(), n)), "items/s")
 
 
 
@@ -557,50 +1498,1238 @@ class Stack:
 
 
 ##### Hash tables
+    # Open addressing: entries live directly in 3 flat, parallel lists
+        # _keys[i], _values[i], _hashes[i] describe slot i
+        # hash(key) is cached, so probing and resizing never call __hash__ again
+    # Collisions probe linearly (i, i+1, i+2...) until an empty slot
+    # Deleted slots become tombstones so probe chains stay unbroken
+        # A resize rebuilds the lists from the live entries only => tombstones are compacted away
+    # Capacity is a power of 2 and slot = Fibonacci hash of hash(key)
+        # Multiplying by 2^64/phi scatters keys like consecutive ints
+        # (hash(i) == i), which would otherwise fill neighbouring slots
+    # incremental=True spreads resizes out over time, like Redis' dict:
+        # the old slot lists stay alive next to the new ones
+        # every insert/get/delete first moves a few old slots into the new table
+        # lookups check the new table, then the old one, until migration ends
+        # => no single call pays for rehashing the whole table
+_EMPTY = object()     # Slot never used
+_DELETED = object()   # Tombstone
+_FIBONACCI = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+_REHASH_STEPS = 16    # Old slots migrated per operation in incremental mode
+
+def _probe(keys, hashes, mask, shift, key, h):
+    # Linear probe for "key" in one set of slot lists, -1 if it's not there
+    i = ((h * _FIBONACCI) & _MASK64) >> shift
+    while True:
+        record_key = keys[i]
+        if record_key is _EMPTY: return -1
+            # Chains end at an empty slot; tombstones are skipped
+        if hashes[i] == h and record_key is not _DELETED and \
+                (record_key is key or record_key == key):
+            return i
+        i = (i + 1) & mask
+
 class HashTable:
-    def __init__(self, size: int = 10):
-        self.size = size
-        self.table = [[] for _ in range(self.size)]
+    def __init__(self, size: int = 10, max_load: float = 0.7, incremental: bool = False):
+        if not 0 < max_load < 1:
+            raise ValueError("max_load needs to be between 0 and 1")
+        self.max_load = max_load
+        self.incremental = incremental
+        self.count = 0      # Live entries (in both tables while migrating)
+        self._used = 0      # Live entries + tombstones
+        self._old_keys = None   # Old slot lists, only set while migrating
+        self._allocate(size)
+
+    def _allocate(self, size: int) -> None:
+        # Fresh, empty slot lists with at least "size" slots
+        capacity = 8
+        while capacity < size: capacity *= 2
+        self.size = capacity
+        self._mask = capacity - 1
+        self._shift = 64 - (capacity.bit_length() - 1)
+        self._keys = [_EMPTY] * capacity
+        self._values = [None] * capacity
+        self._hashes = [0] * capacity
+
+    def __len__(self) -> int:
+        return self.count
 
     def __str__(self):
         items = []
-        for i, bucket in enumerate(self.table):
-            if bucket: items.append(f"Bucket {i}: {bucket}")
+        for keys, values in self._tables():
+            for i, key in enumerate(keys):
+                if key is not _EMPTY and key is not _DELETED:
+                    items.append(f"Bucket {i}: [{(key, values[i])}]")
         return "\n".join(items)
     
     def _hash(self, key) -> int:
-        # Hash function
-        return hash(key) % self.size
+        # Hash function: home slot of "key"
+        return self._slot(hash(key))
             # "hash()" = built-in hash fcn
 
+    def _slot(self, h: int) -> int:
+        return ((h * _FIBONACCI) & _MASK64) >> self._shift
+
+    def _lookup(self, key, h: int) -> int:
+        # Slot holding "key", -1 if it's not in the table
+        return _probe(self._keys, self._hashes, self._mask, self._shift, key, h)
+
+    def _lookup_old(self, key, h: int) -> int:
+        # Same, in the old table of an unfinished incremental resize
+        if self._old_keys is None: return -1
+        return _probe(self._old_keys, self._old_hashes, self._old_mask,
+                      self._old_shift, key, h)
+
+    def _capacity_for(self, count: int) -> int:
+        # Smallest capacity that leaves "count" entries at half the max load
+        capacity = 8
+        while count > capacity * self.max_load / 2: capacity *= 2
+        return capacity
+
+    def _rebuild(self, size: int) -> None:
+        # Resize, either all at once or by starting a migration
+        if not self.incremental:
+            self._resize(size)
+            return
+        self._finish_rehash()   # At most one migration at a time
+        self._old_keys, self._old_values, self._old_hashes = \
+            self._keys, self._values, self._hashes
+        self._old_mask, self._old_shift = self._mask, self._shift
+        self._rehash_pos = 0
+        self._allocate(size)
+        self._used = 0
+
+    def _rehash_step(self, steps: int = _REHASH_STEPS) -> None:
+        # Moves the next "steps" old slots into the new table
+        old_keys = self._old_keys
+        if old_keys is None: return
+        old_values, old_hashes = self._old_values, self._old_hashes
+        keys, values, hashes = self._keys, self._values, self._hashes
+        mask, shift = self._mask, self._shift
+        start = self._rehash_pos
+        stop = min(start + steps, len(old_keys))
+        for j in range(start, stop):
+            key = old_keys[j]
+            if key is _EMPTY or key is _DELETED: continue
+            h = old_hashes[j]
+            i = ((h * _FIBONACCI) & _MASK64) >> shift
+            while keys[i] is not _EMPTY: i = (i + 1) & mask
+                # Keys are never in both tables, so no equality checks needed
+            keys[i] = key; values[i] = old_values[j]; hashes[i] = h
+            old_keys[j] = _DELETED  # Tombstone, keeps old probe chains intact
+            old_values[j] = None
+            self._used += 1
+        self._rehash_pos = stop
+        if stop == len(old_keys):
+            self._old_keys = self._old_values = self._old_hashes = None
+
+    def _finish_rehash(self) -> None:
+        if self._old_keys is not None:
+            self._rehash_step(len(self._old_keys))
+
+    def _resize(self, size: int) -> None:
+        # Rebuild with "size" slots, re-placing live entries by their cached hash
+            # Keys are known to be distinct, so only empty slots are searched for
+        old = zip(self._keys, self._values, self._hashes)
+        self._allocate(size)
+        keys, values, hashes = self._keys, self._values, self._hashes
+        mask, shift = self._mask, self._shift
+        for key, value, h in old:
+            if key is _EMPTY or key is _DELETED: continue
+            i = ((h * _FIBONACCI) & _MASK64) >> shift
+            while keys[i] is not _EMPTY: i = (i + 1) & mask
+            keys[i] = key; values[i] = value; hashes[i] = h
+        self._used = self.count
+
     def insert(self, key, value):
         # insert/update key-value pair
-        index = self._hash(key)
-        bucket = self.table[index]
-        for i, (record_key, record_value) in enumerate(bucket):
-            # This for-loop only runs is "bucket" is NOT EMPTY
-            if record_key == key:
-                # CHecks for COLLISION case
-                bucket[i] = (key, value)    # UPDATE key,value pair
+        h = hash(key)
+        if self._old_keys is not None:
+            self._rehash_step()
+            j = self._lookup_old(key, h)
+            if j >= 0:  # Not migrated yet: move it over now, then update below
+                self._old_keys[j] = _DELETED
+                self._old_values[j] = None
+                self.count -= 1
+        keys, hashes, mask = self._keys, self._hashes, self._mask
+        i = ((h * _FIBONACCI) & _MASK64) >> self._shift
+        tombstone = -1
+        while True:
+            record_key = keys[i]
+            if record_key is _EMPTY: break
+            if record_key is _DELETED:
+                if tombstone < 0: tombstone = i     # Reusable, but key may be further on
+            elif hashes[i] == h and (record_key is key or record_key == key):
+                self._values[i] = value    # UPDATE key,value pair
                 return
-        bucket.append((key, value))
+            i = (i + 1) & mask
+        if tombstone >= 0: i = tombstone
+        else: self._used += 1
+        keys[i] = key; self._values[i] = value; hashes[i] = h
+        self.count += 1
+        if self._used > self.size * self.max_load:
+            # Too full (counting tombstones): grow, or just compact if mostly tombstones
+            self._rebuild(self._capacity_for(self.count))
 
     def get(self, key):
         # REtrieve value by key
-        index = self._hash(key)
-        bucket = self.table[index]
-        for record_key, record_value in bucket:
-            if record_key == key: return record_value
+        h = hash(key)
+        if self._old_keys is not None:
+            self._rehash_step()     # Every get moves the migration along, hit or miss
+            i = self._lookup(key, h)
+            if i >= 0: return self._values[i]
+            j = self._lookup_old(key, h)
+            if j >= 0: return self._old_values[j]
+            raise KeyError("key not found")
+        i = self._lookup(key, h)
+        if i >= 0: return self._values[i]
         raise KeyError("key not found")
     
     def delete(self, key):
-        index = self._hash(key)
-        bucket = self.table[index]
-        for i, (record_key, record_value) in enumerate(bucket):
-            if record_key == key: 
-                bucket.pop(i)
+        h = hash(key)
+        if self._old_keys is not None:
+            self._rehash_step()
+            j = self._lookup_old(key, h)
+            if j >= 0:
+                self._old_keys[j] = _DELETED
+                self._old_values[j] = None
+                self.count -= 1
                 return
-        raise KeyError("key not found")
+        i = self._lookup(key, h)
+        if i < 0: raise KeyError("key not found")
+        self._keys[i] = _DELETED
+        self._values[i] = None
+        self.count -= 1
+        if self.size > 8 and self.count < self.size * self.max_load / 4:
+            self._rebuild(self._capacity_for(self.count))    # Shrink
+
+    def __contains__(self, key) -> bool:
+        h = hash(key)
+        return self._lookup(key, h) >= 0 or self._lookup_old(key, h) >= 0
+
+    #### Batch operations
+        # The batch is hashed up front (map(hash, ...) runs in C), the table is
+        # sized once for the whole batch, then one loop with everything in locals
+        # probes and writes every key => no per-key method calls or resize checks
+        # A pending incremental migration is finished first
+    def insert_many(self, pairs):
+        # insert/update every (key, value) pair
+        if hasattr(pairs, "items"): pairs = pairs.items()
+        pairs = list(pairs)
+        if not pairs: return
+        self._finish_rehash()
+        batch_hashes = list(map(hash, [pair[0] for pair in pairs]))
+        if self._used + len(pairs) > self.size * self.max_load:
+            self._resize(self._capacity_for(self.count + len(pairs)))
+        keys, values, hashes = self._keys, self._values, self._hashes
+        mask, shift = self._mask, self._shift
+        added = reused = 0
+        for (key, value), h in zip(pairs, batch_hashes):
+            i = ((h * _FIBONACCI) & _MASK64) >> shift
+            tombstone = -1
+            while True:
+                record_key = keys[i]
+                if record_key is _EMPTY: break
+                if record_key is _DELETED:
+                    if tombstone < 0: tombstone = i
+                elif hashes[i] == h and (record_key is key or record_key == key):
+                    break
+                i = (i + 1) & mask
+            if record_key is _EMPTY:
+                if tombstone >= 0:
+                    i = tombstone
+                    reused += 1
+                added += 1
+                keys[i] = key; hashes[i] = h
+            values[i] = value
+        self.count += added
+        self._used += added - reused
+
+    def get_many(self, keys, default=None):
+        # Values for every key, "default" for missing ones
+        self._finish_rehash()
+        batch_keys = list(keys)
+        table_keys, values, hashes = self._keys, self._values, self._hashes
+        mask, shift = self._mask, self._shift
+        result = []
+        append = result.append
+        for key, h in zip(batch_keys, map(hash, batch_keys)):
+            i = ((h * _FIBONACCI) & _MASK64) >> shift
+            while True:
+                record_key = table_keys[i]
+                if record_key is _EMPTY:
+                    append(default)
+                    break
+                if hashes[i] == h and record_key is not _DELETED and \
+                        (record_key is key or record_key == key):
+                    append(values[i])
+                    break
+                i = (i + 1) & mask
+        return result
+
+    def delete_many(self, keys):
+        # Deletes every key that is present, returns how many were deleted
+        self._finish_rehash()
+        batch_keys = list(keys)
+        table_keys, values, hashes = self._keys, self._values, self._hashes
+        mask, shift = self._mask, self._shift
+        deleted = 0
+        for key, h in zip(batch_keys, map(hash, batch_keys)):
+            i = ((h * _FIBONACCI) & _MASK64) >> shift
+            while True:
+                record_key = table_keys[i]
+                if record_key is _EMPTY: break
+                if hashes[i] == h and record_key is not _DELETED and \
+                        (record_key is key or record_key == key):
+                    table_keys[i] = _DELETED
+                    values[i] = None
+                    deleted += 1
+                    break
+                i = (i + 1) & mask
+        self.count -= deleted
+        if self.size > 8 and self.count < self.size * self.max_load / 4:
+            self._rebuild(self._capacity_for(self.count))    # Shrink once, at the end
+        return deleted
+
+    def _tables(self):
+        # Slot lists currently holding entries (2 while migrating)
+        yield self._keys, self._values
+        if self._old_keys is not None: yield self._old_keys, self._old_values
+
+    def __iter__(self):
+        for keys, _ in self._tables():
+            for key in keys:
+                if key is not _EMPTY and key is not _DELETED: yield key
+
+    def items(self):
+        for keys, values in self._tables():
+            for key, value in zip(keys, values):
+                if key is not _EMPTY and key is not _DELETED: yield key, value
+
+    @classmethod
+    def open(cls, path: str, size: int = 1024, max_load: float = 0.7) -> "DiskHashTable":
+        ## Disk-backed table stored in directory "path", see DiskHashTable
+        return DiskHashTable(path, size, max_load)
+
+### Experimenting with HashTable
+# ht = HashTable()
+# for i in range(20): ht.insert(f"key{i}", i)
+# ht.delete("key3")
+# print(ht.get("key7"), len(ht), ht.size)
+# print(ht)
+# iht = HashTable(incremental=True)
+# for i in range(1000): iht.insert(i, i)
+# print(iht.get(999), len(iht), iht._old_keys is not None)
+
+### Benchmarking insert tail latency while growing
+# import time
+# for incremental in (False, True):
+#     table, worst = HashTable(incremental=incremental), 0
+#     for k in range(5_000_000):
+#         start = time.perf_counter()
+#         table.insert(k, k)
+#         worst = max(worst, time.perf_counter() - start)
+#     print(f"incremental={incremental}: worst insert {worst * 1000:.1f} ms")
+
+### Benchmarking batch insert against a loop of insert
+# import time
+# pairs = [(k, k) for k in range(1_000_000)]
+# start = time.perf_counter()
+# table = HashTable()
+# for k, v in pairs: table.insert(k, v)
+# middle = time.perf_counter()
+# HashTable().insert_many(pairs)
+# print(f"insert loop {middle - start:.2f}s  insert_many {time.perf_counter() - middle:.2f}s")
+
+### Benchmarking against dict
+# import time
+# keys = list(range(10_000_000))
+# for name, table, insert, get in (
+#         ("HashTable", HashTable(), HashTable.insert, HashTable.get),
+#         ("dict", {}, dict.__setitem__, dict.__getitem__)):
+#     start = time.perf_counter()
+#     for k in keys: insert(table, k, k)
+#     middle = time.perf_counter()
+#     for k in keys: get(table, k)
+#     end = time.perf_counter()
+#     print(f"{name:10} insert {middle - start:.2f}s  get {end - middle:.2f}s")
+
+
+
+
+
+#### Disk-backed hash table
+    # Two files in one directory:
+        # data.log: append-only log of records, never rewritten in place
+        # index.bin: open-addressing index, memory-mapped, slot = (hash, log offset)
+    # The index is used straight from the mmap => HashTable.open() is O(1),
+        # the OS pages the index in as it gets probed
+    # Keys and values are pickled; slots hash the pickled key with blake2b,
+        # because hash() of str/bytes changes between processes
+    # Same methods as HashTable (insert/get/delete, the batch versions, items...),
+        # but not a subclass: none of HashTable's in-memory slot lists exist here
+    # Keys match by their pickled bytes, not by "==": equal keys of different
+        # types are different keys here (1, 1.0 and True are three keys), and so
+        # are equal keys that pickle differently (e.g. sets in another order)
+    # Crash safety:
+        # every record carries a crc32, so a torn write at the end is detectable
+        # sync() fsyncs the log, then flushes the index marked "clean"
+        # the first write after a sync() marks the index "dirty" on disk
+        # opening a dirty index (crash since the last sync) replays the log instead
+        # log and index share a generation number, so an index from before
+            # a compact() is never paired with the compacted log
+_LOG_MAGIC = b"DSALOG1\0"
+_INDEX_MAGIC = b"DSAIDX1\0"
+_LOG_HEADER = struct.Struct("<8sQ")             # magic, generation
+_INDEX_HEADER = struct.Struct("<8sQQQQQQ")      # magic, generation, capacity, count, used, log size, clean
+_RECORD_HEADER = struct.Struct("<IBII")         # crc32, kind, key length, value length
+_SLOT = struct.Struct("<QQ")                    # key hash, log offset
+_SLOT_EMPTY = 0     # Offsets below the log header can't be records,
+_SLOT_DELETED = 1   # so they double as slot markers
+_RECORD_PUT = 1
+_RECORD_DELETE = 0
+
+def _stable_hash(key_bytes: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(key_bytes, digest_size=8).digest(), "little")
+
+def _encode_record(kind: int, key_bytes: bytes, value_bytes: bytes = b"") -> bytes:
+    body = _RECORD_HEADER.pack(0, kind, len(key_bytes), len(value_bytes))[4:] + key_bytes + value_bytes
+    return struct.pack("<I", zlib.crc32(body)) + body
+
+class DiskHashTable:
+    def __init__(self, path: str, size: int = 1024, max_load: float = 0.7):
+        if not 0 < max_load < 1:
+            raise ValueError("max_load needs to be between 0 and 1")
+        self.path = path
+        self.max_load = max_load
+        os.makedirs(path, exist_ok=True)
+        self._log_path = os.path.join(path, "data.log")
+        self._index_path = os.path.join(path, "index.bin")
+        self._log_fd = os.open(self._log_path, os.O_RDWR | os.O_CREAT)
+        self._log_size = os.fstat(self._log_fd).st_size
+        if self._log_size < _LOG_HEADER.size:
+            self._generation = int.from_bytes(os.urandom(8), "little")
+            os.pwrite(self._log_fd, _LOG_HEADER.pack(_LOG_MAGIC, self._generation), 0)
+            os.fsync(self._log_fd)
+            self._log_size = _LOG_HEADER.size
+        else:
+            magic, self._generation = _LOG_HEADER.unpack(os.pread(self._log_fd, _LOG_HEADER.size, 0))
+            if magic != _LOG_MAGIC:
+                raise ValueError(f"{self._log_path} is not a hash table log")
+        self._mmap = None
+        if not self._open_index():
+            self._recover(size)
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return self.count
+
+    _capacity_for = HashTable._capacity_for    # Same sizing rule as the in-memory table
+
+    #### Index file
+    def _open_index(self) -> bool:
+        # Maps index.bin, False if it's missing, stale or from an unclean shutdown
+        try:
+            fd = os.open(self._index_path, os.O_RDWR)
+        except FileNotFoundError:
+            return False
+        try:
+            header = os.pread(fd, _INDEX_HEADER.size, 0)
+            if len(header) < _INDEX_HEADER.size: return False
+            magic, generation, capacity, count, used, log_size, clean = _INDEX_HEADER.unpack(header)
+            if magic != _INDEX_MAGIC or generation != self._generation or not clean \
+                    or log_size > self._log_size or capacity & (capacity - 1):
+                return False    # A capacity that isn't a power of two can't be probed: rebuild
+            if os.fstat(fd).st_size < _INDEX_HEADER.size + capacity * _SLOT.size:
+                return False    # Truncated index: the log is replayed instead
+            self._mmap = mmap.mmap(fd, _INDEX_HEADER.size + capacity * _SLOT.size)
+        finally:
+            os.close(fd)
+        self.size, self.count, self._used = capacity, count, used
+        self._mask = capacity - 1
+        self._shift = 64 - (capacity.bit_length() - 1)
+        if log_size < self._log_size:   # Unsynced tail past the clean point
+            os.ftruncate(self._log_fd, log_size)
+            self._log_size = log_size
+        return True
+
+    def _write_index(self, capacity: int, entries: list, clean: bool) -> None:
+        # Writes a fresh index.bin holding "entries" [(hash, offset)], then maps it
+            # Built in a temp file and renamed over, so a crash never leaves half an index
+        temp_path = self._index_path + ".tmp"
+        fd = os.open(temp_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC)
+        try:
+            os.ftruncate(fd, _INDEX_HEADER.size + capacity * _SLOT.size)
+            index = mmap.mmap(fd, _INDEX_HEADER.size + capacity * _SLOT.size)
+        finally:
+            os.close(fd)
+        mask, shift = capacity - 1, 64 - (capacity.bit_length() - 1)
+        for h, offset in entries:
+            i = ((h * _FIBONACCI) & _MASK64) >> shift
+            while _SLOT.unpack_from(index, _INDEX_HEADER.size + i * _SLOT.size)[1] != _SLOT_EMPTY:
+                i = (i + 1) & mask
+            _SLOT.pack_into(index, _INDEX_HEADER.size + i * _SLOT.size, h, offset)
+        _INDEX_HEADER.pack_into(index, 0, _INDEX_MAGIC, self._generation, capacity,
+                                len(entries), len(entries), self._log_size, int(clean))
+        index.flush()
+        index.close()
+        os.replace(temp_path, self._index_path)
+        if self._mmap is not None: self._mmap.close()
+        fd = os.open(self._index_path, os.O_RDWR)
+        try:
+            self._mmap = mmap.mmap(fd, _INDEX_HEADER.size + capacity * _SLOT.size)
+        finally:
+            os.close(fd)
+        self.size, self.count, self._used = capacity, len(entries), len(entries)
+        self._mask, self._shift = mask, shift
+
+    def _recover(self, size: int) -> None:
+        # Rebuilds the index by replaying the log
+            # Stops at the first torn/corrupt record and cuts the log there
+        live = {}   # key bytes -> (hash, offset)
+        offset = _LOG_HEADER.size
+        with open(self._log_path, "rb") as log:
+            log.seek(offset)
+            while True:
+                header = log.read(_RECORD_HEADER.size)
+                if len(header) < _RECORD_HEADER.size: break
+                crc, kind, key_length, value_length = _RECORD_HEADER.unpack(header)
+                payload = log.read(key_length + value_length)
+                if len(payload) < key_length + value_length or \
+                        zlib.crc32(header[4:] + payload) != crc:
+                    break
+                key_bytes = payload[:key_length]
+                if kind == _RECORD_PUT: live[key_bytes] = (_stable_hash(key_bytes), offset)
+                else: live.pop(key_bytes, None)
+                offset += _RECORD_HEADER.size + key_length + value_length
+        if offset < self._log_size:
+            os.ftruncate(self._log_fd, offset)
+            os.fsync(self._log_fd)
+            self._log_size = offset
+        capacity = 8
+        while capacity < size: capacity *= 2
+            # Power of two like HashTable._allocate: the probe wraps with "& mask"
+        self._write_index(max(self._capacity_for(len(live)), capacity), list(live.values()), True)
+
+    def _read_slot(self, i: int) -> tuple:
+        return _SLOT.unpack_from(self._mmap, _INDEX_HEADER.size + i * _SLOT.size)
+
+    def _write_slot(self, i: int, h: int, offset: int) -> None:
+        _SLOT.pack_into(self._mmap, _INDEX_HEADER.size + i * _SLOT.size, h, offset)
+
+    def _live_slots(self):
+        for i in range(self.size):
+            h, offset = self._read_slot(i)
+            if offset > _SLOT_DELETED: yield h, offset
+
+    #### Log file
+    def _read_record(self, offset: int) -> tuple:
+        # (key bytes, value bytes) of the record at "offset"
+        header = os.pread(self._log_fd, _RECORD_HEADER.size, offset)
+        _, _, key_length, value_length = _RECORD_HEADER.unpack(header)
+        payload = os.pread(self._log_fd, key_length + value_length, offset + _RECORD_HEADER.size)
+        return payload[:key_length], payload[key_length:]
+
+    def _append(self, data: bytes) -> int:
+        # Appends encoded record(s), returns where they start
+        self._mark_dirty()
+        offset = self._log_size
+        os.pwrite(self._log_fd, data, offset)
+        self._log_size += len(data)
+        return offset
+
+    def _mark_dirty(self) -> None:
+        # First change since the last sync(): persist "not clean" before touching anything
+        if self._dirty: return
+        _INDEX_HEADER.pack_into(self._mmap, 0, _INDEX_MAGIC, self._generation, self.size,
+                                self.count, self._used, self._log_size, 0)
+        self._mmap.flush(0, min(mmap.PAGESIZE, len(self._mmap)))
+        self._dirty = True
+
+    def sync(self) -> None:
+        ## Durability point: everything written so far survives a crash
+        os.fsync(self._log_fd)
+        _INDEX_HEADER.pack_into(self._mmap, 0, _INDEX_MAGIC, self._generation, self.size,
+                                self.count, self._used, self._log_size, 1)
+        self._mmap.flush()
+        self._dirty = False
+
+    def close(self) -> None:
+        if self._mmap is None: return
+        self.sync()
+        self._mmap.close()
+        self._mmap = None
+        os.close(self._log_fd)
+
+    def __enter__(self) -> "DiskHashTable":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    #### Hash table operations
+    def _find(self, key_bytes: bytes, h: int) -> tuple:
+        # (slot, offset) of the key, or (first reusable slot, -1) when missing
+        i = ((h * _FIBONACCI) & _MASK64) >> self._shift
+        reusable = -1
+        while True:
+            slot_hash, offset = self._read_slot(i)
+            if offset == _SLOT_EMPTY:
+                return (i if reusable < 0 else reusable), -1
+            if offset == _SLOT_DELETED:
+                if reusable < 0: reusable = i
+            elif slot_hash == h and self._read_record(offset)[0] == key_bytes:
+                return i, offset
+            i = (i + 1) & self._mask
+
+    def _put(self, key_bytes: bytes, h: int, offset: int) -> None:
+        # Points the key's slot at a freshly appended record
+        i, old_offset = self._find(key_bytes, h)
+        if old_offset < 0:
+            if self._read_slot(i)[1] == _SLOT_EMPTY: self._used += 1
+            self.count += 1
+        self._write_slot(i, h, offset)
+        if self._used > self.size * self.max_load:
+            self._write_index(self._capacity_for(self.count), list(self._live_slots()), False)
+
+    def insert(self, key, value):
+        # insert/update key-value pair
+        key_bytes = pickle.dumps(key, pickle.HIGHEST_PROTOCOL)
+        record = _encode_record(_RECORD_PUT, key_bytes, pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        self._put(key_bytes, _stable_hash(key_bytes), self._append(record))
+
+    def insert_many(self, pairs):
+        # One write for the whole batch, then one index update per key
+        if hasattr(pairs, "items"): pairs = pairs.items()
+        records, keys = [], []
+        for key, value in pairs:
+            key_bytes = pickle.dumps(key, pickle.HIGHEST_PROTOCOL)
+            records.append(_encode_record(_RECORD_PUT, key_bytes,
+                                          pickle.dumps(value, pickle.HIGHEST_PROTOCOL)))
+            keys.append(key_bytes)
+        if not records: return
+        offset = self._append(b"".join(records))
+        for key_bytes, record in zip(keys, records):
+            self._put(key_bytes, _stable_hash(key_bytes), offset)
+            offset += len(record)
+
+    def get(self, key):
+        # REtrieve value by key
+        key_bytes = pickle.dumps(key, pickle.HIGHEST_PROTOCOL)
+        _, offset = self._find(key_bytes, _stable_hash(key_bytes))
+        if offset < 0: raise KeyError("key not found")
+        return pickle.loads(self._read_record(offset)[1])
+
+    def get_many(self, keys, default=None):
+        result = []
+        for key in keys:
+            try: result.append(self.get(key))
+            except KeyError: result.append(default)
+        return result
+
+    def delete(self, key):
+        key_bytes = pickle.dumps(key, pickle.HIGHEST_PROTOCOL)
+        i, offset = self._find(key_bytes, _stable_hash(key_bytes))
+        if offset < 0: raise KeyError("key not found")
+        self._append(_encode_record(_RECORD_DELETE, key_bytes))
+            # Logged so that replaying the log doesn't bring the key back
+        self._write_slot(i, 0, _SLOT_DELETED)
+        self.count -= 1
+
+    def delete_many(self, keys):
+        deleted = 0
+        for key in keys:
+            try:
+                self.delete(key)
+                deleted += 1
+            except KeyError: pass
+        return deleted
+
+    def __contains__(self, key) -> bool:
+        key_bytes = pickle.dumps(key, pickle.HIGHEST_PROTOCOL)
+        return self._find(key_bytes, _stable_hash(key_bytes))[1] >= 0
+
+    def __iter__(self):
+        for _, offset in self._live_slots():
+            yield pickle.loads(self._read_record(offset)[0])
+
+    def items(self):
+        for _, offset in self._live_slots():
+            key_bytes, value_bytes = self._read_record(offset)
+            yield pickle.loads(key_bytes), pickle.loads(value_bytes)
+
+    def __str__(self):
+        items = []
+        for i in range(self.size):
+            _, offset = self._read_slot(i)
+            if offset > _SLOT_DELETED:
+                key_bytes, value_bytes = self._read_record(offset)
+                items.append(f"Bucket {i}: [{(pickle.loads(key_bytes), pickle.loads(value_bytes))}]")
+        return "\n".join(items)
+
+    def compact(self) -> None:
+        ## Rewrites the log with live records only, reclaiming overwritten/deleted ones
+            # New log + index get a new generation; each is swapped in with an atomic rename
+            # A crash between the two renames leaves a generation mismatch => log replay
+        temp_path = self._log_path + ".tmp"
+        generation = int.from_bytes(os.urandom(8), "little")
+        entries = []
+        with open(temp_path, "wb") as log:
+            log.write(_LOG_HEADER.pack(_LOG_MAGIC, generation))
+            for h, offset in self._live_slots():
+                key_bytes, value_bytes = self._read_record(offset)
+                entries.append((h, log.tell()))
+                log.write(_encode_record(_RECORD_PUT, key_bytes, value_bytes))
+            log.flush()
+            os.fsync(log.fileno())
+            log_size = log.tell()
+        os.replace(temp_path, self._log_path)
+        os.close(self._log_fd)
+        self._log_fd = os.open(self._log_path, os.O_RDWR)
+        self._generation, self._log_size = generation, log_size
+        self._write_index(self._capacity_for(len(entries)), entries, True)
+        self._dirty = False
+
+### Experimenting with DiskHashTable
+# with HashTable.open("/tmp/table") as dht:
+#     dht.insert("a", 1)
+#     dht.insert("b", [2, 3])
+#     dht.delete("a")
+#     dht.compact()
+# with HashTable.open("/tmp/table") as dht:
+#     print(dht, len(dht))
+# with HashTable.open("/tmp/table1000", size=1000) as dht:    # Rounded up to 1024 slots
+#     for i in range(5000): dht.insert(i, i)
+#     print(dht.size, dht.get(4999))
+
+
+
+
+
+#### Sharded hash table
+    # Keys are split over N independent HashTables by hash(key) % N
+    # Each shard has its own lock (lock striping), so threads working on
+        # different shards never wait for each other
+    # Each shard resizes on its own => a resize only blocks 1/N of the keys
+class ShardedHashTable:
+    def __init__(self, shards: int = 16, size: int = 10, max_load: float = 0.7,
+                 incremental: bool = False):
+        if shards <= 0:
+            raise ValueError("Number of shards needs to be positive")
+        per_shard = max(size // shards, 1)
+        self._shards = [HashTable(per_shard, max_load, incremental) for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+
+    def _shard(self, key) -> int:
+        return hash(key) % len(self._shards)
+
+    def __len__(self) -> int:
+        return sum(map(len, self._shards))
+
+    def __str__(self):
+        return "\n".join(f"Shard {i}:\n{shard}" for i, shard in enumerate(self._shards) if len(shard))
+
+    def insert(self, key, value):
+        i = self._shard(key)
+        with self._locks[i]: self._shards[i].insert(key, value)
+
+    def get(self, key):
+        i = self._shard(key)
+        with self._locks[i]: return self._shards[i].get(key)
+
+    def delete(self, key):
+        i = self._shard(key)
+        with self._locks[i]: self._shards[i].delete(key)
+
+    def __contains__(self, key) -> bool:
+        i = self._shard(key)
+        with self._locks[i]: return key in self._shards[i]
+
+    def _group(self, keys) -> list:
+        # Positions of "keys" per shard
+        groups = [[] for _ in self._shards]
+        n = len(self._shards)
+        for position, h in enumerate(map(hash, keys)):
+            groups[h % n].append(position)
+        return groups
+
+    def insert_many(self, pairs):
+        # One batch per shard, each applied under its lock once
+        if hasattr(pairs, "items"): pairs = pairs.items()
+        pairs = list(pairs)
+        for i, positions in enumerate(self._group([pair[0] for pair in pairs])):
+            if positions:
+                with self._locks[i]: self._shards[i].insert_many([pairs[p] for p in positions])
+
+    def get_many(self, keys, default=None):
+        keys = list(keys)
+        result = [default] * len(keys)
+        for i, positions in enumerate(self._group(keys)):
+            if not positions: continue
+            with self._locks[i]:
+                values = self._shards[i].get_many([keys[p] for p in positions], default)
+            for p, value in zip(positions, values): result[p] = value
+        return result
+
+    def delete_many(self, keys):
+        keys = list(keys)
+        deleted = 0
+        for i, positions in enumerate(self._group(keys)):
+            if positions:
+                with self._locks[i]: deleted += self._shards[i].delete_many([keys[p] for p in positions])
+        return deleted
+
+    def items(self):
+        # Each shard is copied under its lock, then yielded without holding it
+        for lock, shard in zip(self._locks, self._shards):
+            with lock: snapshot = list(shard.items())
+            yield from snapshot
+
+    def __iter__(self):
+        for key, _ in self.items(): yield key
+
+#### Shared-memory hash table
+    # Read-only table laid out in one multiprocessing.shared_memory block,
+        # using the DiskHashTable format: header, (hash, offset) slots, records
+    # Pickling only sends the block's name => process-pool workers attach to
+        # the same memory instead of receiving a copy of the table
+    # The creating process owns the block and should unlink() it when done
+_SHARED_MAGIC = b"DSASHM1\0"
+_SHARED_HEADER = struct.Struct("<8sQQ")     # magic, capacity, count
+
+class SharedHashTable:
+    def __init__(self, name: str):
+        ## Attach to an existing block, see SharedHashTable.create()
+        self._shm = shared_memory.SharedMemory(name=name)
+        magic, self.size, self.count = _SHARED_HEADER.unpack_from(self._shm.buf, 0)
+        if magic != _SHARED_MAGIC:
+            raise ValueError(f"{name} doesn't hold a shared hash table")
+        self.name = name
+        self._mask = self.size - 1
+        self._shift = 64 - (self.size.bit_length() - 1)
+
+    @classmethod
+    def create(cls, items, max_load: float = 0.7) -> "SharedHashTable":
+        ## Builds a new block from a mapping, HashTable or (key, value) pairs
+        if hasattr(items, "items"): items = items.items()
+        records, entries = [], {}
+        for key, value in items:
+            key_bytes = pickle.dumps(key, pickle.HIGHEST_PROTOCOL)
+            entries[key_bytes] = len(records)   # Later duplicates win
+            records.append(_encode_record(_RECORD_PUT, key_bytes,
+                                          pickle.dumps(value, pickle.HIGHEST_PROTOCOL)))
+        capacity = 8
+        while len(entries) > capacity * max_load: capacity *= 2
+        slots_end = _SHARED_HEADER.size + capacity * _SLOT.size
+        shm = shared_memory.SharedMemory(create=True,
+                                         size=slots_end + sum(map(len, records)))
+        buffer, mask, shift = shm.buf, capacity - 1, 64 - (capacity.bit_length() - 1)
+        offsets, offset = [], slots_end
+        for record in records:
+            buffer[offset:offset + len(record)] = record
+            offsets.append(offset)
+            offset += len(record)
+        buffer[_SHARED_HEADER.size:slots_end] = bytes(capacity * _SLOT.size)
+        for key_bytes, r in entries.items():
+            h = _stable_hash(key_bytes)
+            i = ((h * _FIBONACCI) & _MASK64) >> shift
+            while _SLOT.unpack_from(buffer, _SHARED_HEADER.size + i * _SLOT.size)[1] != _SLOT_EMPTY:
+                i = (i + 1) & mask
+            _SLOT.pack_into(buffer, _SHARED_HEADER.size + i * _SLOT.size, h, offsets[r])
+        _SHARED_HEADER.pack_into(buffer, 0, _SHARED_MAGIC, capacity, len(entries))
+        table = cls.__new__(cls)
+        table._shm, table.name, table.size, table.count = shm, shm.name, capacity, len(entries)
+        table._mask, table._shift = mask, shift
+        return table
+
+    def __reduce__(self) -> tuple:
+        return (self.__class__, (self.name,))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _record(self, offset: int) -> tuple:
+        # (key bytes, value bytes) views of the record at "offset", no copy
+        _, _, key_length, value_length = _RECORD_HEADER.unpack_from(self._shm.buf, offset)
+        start = offset + _RECORD_HEADER.size
+        return (self._shm.buf[start:start + key_length],
+                self._shm.buf[start + key_length:start + key_length + value_length])
+
+    def _find(self, key) -> int:
+        # Offset of the key's record, -1 if it's missing
+        key_bytes = pickle.dumps(key, pickle.HIGHEST_PROTOCOL)
+        h = _stable_hash(key_bytes)
+        i = ((h * _FIBONACCI) & _MASK64) >> self._shift
+        buffer = self._shm.buf
+        while True:
+            slot_hash, offset = _SLOT.unpack_from(buffer, _SHARED_HEADER.size + i * _SLOT.size)
+            if offset == _SLOT_EMPTY: return -1
+            if slot_hash == h and self._record(offset)[0] == key_bytes: return offset
+            i = (i + 1) & self._mask
+
+    def get(self, key):
+        offset = self._find(key)
+        if offset < 0: raise KeyError("key not found")
+        return pickle.loads(self._record(offset)[1])
+
+    def __contains__(self, key) -> bool:
+        return self._find(key) >= 0
+
+    def items(self):
+        for i in range(self.size):
+            _, offset = _SLOT.unpack_from(self._shm.buf, _SHARED_HEADER.size + i * _SLOT.size)
+            if offset != _SLOT_EMPTY:
+                key_bytes, value_bytes = self._record(offset)
+                yield pickle.loads(key_bytes), pickle.loads(value_bytes)
+
+    def __iter__(self):
+        for key, _ in self.items(): yield key
+
+    def __str__(self):
+        return "\n".join(f"{key}: {value}" for key, value in self.items())
+
+    def close(self) -> None:
+        ## Detach this process from the block
+        self._shm.close()
+
+    def unlink(self) -> None:
+        ## Free the block (owner only, once every process is done with it)
+        self._shm.unlink()
+
+### Experimenting with sharded tables
+# sht = ShardedHashTable(shards=4)
+# sht.insert_many((i, i * i) for i in range(100))
+# print(sht.get(7), len(sht), sht.get_many([1, 2, 1000], default=-1))
+# shared = SharedHashTable.create({"a": 1, "b": [2, 3]})
+# print(shared.get("b"), len(shared))
+# shared.close(); shared.unlink()
+
+### Benchmarking at 1 to 32 threads and processes
+# import time
+# from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+# def lookups(table, n=100_000):
+#     for k in range(n): table.get(k % 10_000)
+#     return n
+# locked = HashTable(); big_lock = threading.Lock()
+# class GlobalLock:
+#     def get(self, key):
+#         with big_lock: return locked.get(key)
+# sharded = ShardedHashTable(shards=64)
+# for k in range(10_000): locked.insert(k, k); sharded.insert(k, k)
+# shared = SharedHashTable.create(sharded.items())
+# for workers in (1, 2, 4, 8, 16, 32):
+#     for name, pool, table in (("global lock", ThreadPoolExecutor, GlobalLock()),
+#                               ("sharded", ThreadPoolExecutor, sharded),
+#                               ("shared memory", ProcessPoolExecutor, shared)):
+#         with pool(workers) as executor:
+#             start = time.perf_counter()
+#             total = sum(executor.map(lookups, [table] * workers))
+#             print(f"{name:14} {workers:2} workers: {total / (time.perf_counter() - start):,.0f} gets/s")
+# shared.close(); shared.unlink()
+
+
+
+
+
+##### Caches
+    # HashTable maps key -> DoubleNode, whose data is the _CacheEntry
+    # DoubleLinkedLists keep entries in eviction order, so every step is O(1):
+        # LRU: one list, least recently used at the head
+        # LFU: a list of use-count buckets, each bucket an LRU list of its entries
+        # ARC: recency (T1) and frequency (T2) lists, plus "ghost" lists (B1, B2)
+            # of recently evicted keys; ghost hits shift the T1/T2 balance
+    # maxsize caps the number of entries, maxbytes the sum of sizeof(value)
+    # TTL entries expire lazily: a read past the deadline is a miss and drops them
+class _CacheEntry:
+    __slots__ = ("key", "value", "nbytes", "expires", "where")
+
+    def __init__(self, key, value, nbytes, expires):
+        self.key = key
+        self.value = value
+        self.nbytes = nbytes
+        self.expires = expires      # time.monotonic() deadline, None = never
+        self.where = None           # Policy bookkeeping (LFU bucket, ARC list)
+
+#### Eviction policies
+    # add(entry) -> node, hit(node), remove(node), evict() -> entry
+class _LRUPolicy:
+    def __init__(self, maxsize):
+        self._order = DoubleLinkedList()
+
+    def add(self, entry): return self._order.append(entry)
+
+    def hit(self, node): self._order.move_to_end(node)
+
+    def remove(self, node): self._order.unlink(node)
+
+    def evict(self):
+        node = self._order.head
+        self._order.unlink(node)
+        return node.data
+
+class _LFUBucket:
+    __slots__ = ("count", "entries")
+
+    def __init__(self, count):
+        self.count = count
+        self.entries = DoubleLinkedList()
+
+class _LFUPolicy:
+    # Buckets are kept sorted by use count, lowest first
+        # A hit moves the entry to the next bucket (created right after if missing)
+        # => the victim is always the LRU entry of the first bucket
+    def __init__(self, maxsize):
+        self._buckets = DoubleLinkedList()
+
+    def _bucket_after(self, bucket_node, count):
+        # Bucket for "count", which belongs right after "bucket_node" (None = at the front)
+        following = bucket_node.next if bucket_node else self._buckets.head
+        if following and following.data.count == count: return following
+        if bucket_node: return self._buckets.insert_after(bucket_node, _LFUBucket(count))
+        return self._buckets.prepend(_LFUBucket(count))
+
+    def _leave(self, node):
+        bucket_node = node.data.where
+        bucket_node.data.entries.unlink(node)
+        if not bucket_node.data.entries.head:
+            self._buckets.unlink(bucket_node)
+
+    def add(self, entry):
+        bucket_node = self._bucket_after(None, 1)
+        entry.where = bucket_node
+        return bucket_node.data.entries.append(entry)
+
+    def hit(self, node):
+        entry = node.data
+        current = entry.where
+        target = self._bucket_after(current, current.data.count + 1)
+        self._leave(node)
+        entry.where = target
+        target.data.entries.append_node(node)
+
+    def remove(self, node): self._leave(node)
+
+    def evict(self):
+        node = self._buckets.head.data.entries.head
+        self._leave(node)
+        return node.data
+
+class _ARCPolicy:
+    # Adaptive Replacement Cache (Megiddo & Modha), sized by entry count
+        # T1: seen once recently, T2: seen at least twice
+        # B1/B2: keys recently evicted from T1/T2 (no values)
+        # p: target size of T1; a B1 ghost hit grows it, a B2 ghost hit shrinks it
+    def __init__(self, maxsize):
+        if not maxsize:
+            raise ValueError("ARC needs a maxsize")
+        self._capacity = maxsize
+        self._p = 0
+        self._lists = {1: DoubleLinkedList(), 2: DoubleLinkedList()}
+        self._ghost_lists = {1: DoubleLinkedList(), 2: DoubleLinkedList()}
+        self._lengths = {1: 0, 2: 0}
+        self._ghost_lengths = {1: 0, 2: 0}
+        self._ghosts = HashTable()     # key -> (ghost node, 1 or 2)
+        self._ghost_hit_b2 = False
+
+    def _link(self, entry, which):
+        entry.where = which
+        self._lengths[which] += 1
+        return self._lists[which].append(entry)
+
+    def _drop_ghost(self, which):
+        # Forget the oldest ghost of B1/B2
+        node = self._ghost_lists[which].head
+        self._ghost_lists[which].unlink(node)
+        self._ghost_lengths[which] -= 1
+        self._ghosts.delete(node.data)
+
+    def add(self, entry):
+        b1, b2 = self._ghost_lengths[1], self._ghost_lengths[2]
+        try:
+            node, which = self._ghosts.get(entry.key)
+        except KeyError:
+            # Brand new key: keep the directory within c (T1+B1) and 2c (all lists)
+            self._ghost_hit_b2 = False
+            if self._lengths[1] + b1 >= self._capacity and b1:
+                self._drop_ghost(1)
+            elif self._lengths[1] + self._lengths[2] + b1 + b2 >= 2 * self._capacity and b2:
+                self._drop_ghost(2)
+            return self._link(entry, 1)
+        # Ghost hit: it was evicted too early, adapt p towards the list it came from
+        if which == 1: self._p = min(self._capacity, self._p + max(b2 / b1, 1))
+        else: self._p = max(0, self._p - max(b1 / b2, 1))
+        self._ghost_hit_b2 = which == 2
+        self._ghost_lists[which].unlink(node)
+        self._ghost_lengths[which] -= 1
+        self._ghosts.delete(entry.key)
+        return self._link(entry, 2)
+
+    def hit(self, node):
+        entry = node.data
+        if entry.where == 2:
+            self._lists[2].move_to_end(node)
+            return
+        self._lists[1].unlink(node)
+        self._lengths[1] -= 1
+        entry.where = 2
+        self._lengths[2] += 1
+        self._lists[2].append_node(node)
+
+    def remove(self, node):
+        which = node.data.where
+        self._lists[which].unlink(node)
+        self._lengths[which] -= 1
+
+    def evict(self):
+        # ARC's REPLACE: take from T1 if it's over its target p, else from T2
+        t1 = self._lengths[1]
+        if t1 and (t1 > self._p or (self._ghost_hit_b2 and t1 == int(self._p)) \
+                or not self._lengths[2]):
+            which = 1
+        else:
+            which = 2
+        node = self._lists[which].head
+        self.remove(node)
+        key = node.data.key
+        self._ghosts.insert(key, (self._ghost_lists[which].append(key), which))
+        self._ghost_lengths[which] += 1
+        if self._ghost_lengths[which] > self._capacity: self._drop_ghost(which)
+        return node.data
+
+_POLICIES = {"lru": _LRUPolicy, "lfu": _LFUPolicy, "arc": _ARCPolicy}
+_MISSING = object()
+
+class Cache:
+    def __init__(self, maxsize: Optional[int] = 128, maxbytes: Optional[int] = None,
+                 ttl: Optional[float] = None, policy: str = "lru", sizeof=sys.getsizeof):
+        if policy not in _POLICIES:
+            raise ValueError(f"Unknown policy {policy!r}, use one of {sorted(_POLICIES)}")
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.ttl = ttl      # Default time-to-live in seconds, None = never expire
+        self.policy = policy
+        self._sizeof = sizeof
+        self._policy = _POLICIES[policy](maxsize)
+        self._table = HashTable()
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def _discard(self, node) -> None:
+        # Drops an entry that wasn't evicted (expired, deleted or replaced)
+        entry = node.data
+        self._policy.remove(node)
+        self._table.delete(entry.key)
+        self.nbytes -= entry.nbytes
+
+    def get(self, key, default=None):
+        try:
+            node = self._table.get(key)
+        except KeyError:
+            self.misses += 1
+            return default
+        entry = node.data
+        if entry.expires is not None and entry.expires <= time.monotonic():
+            self._discard(node)
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._policy.hit(node)
+        return entry.value
+
+    def set(self, key, value, ttl: Optional[float] = None) -> None:
+        ## Insert/replace "key", evicting as needed; ttl overrides the default
+        nbytes = self._sizeof(value) if self.maxbytes is not None else 0
+        try:
+            node = self._table.get(key)
+        except KeyError:
+            node = None
+        if self.maxbytes is not None and nbytes > self.maxbytes:
+            if node is not None: self._discard(node)    # Old value is stale now
+            return  # Could never fit
+        ttl = self.ttl if ttl is None else ttl
+        expires = None if ttl is None else time.monotonic() + ttl
+        if node is not None:
+            # Update in place: counts as a use, so LFU counts and ARC's T2 survive
+            entry = node.data
+            self.nbytes += nbytes - entry.nbytes
+            entry.value, entry.nbytes, entry.expires = value, nbytes, expires
+            self._policy.hit(node)
+        else:
+            entry = _CacheEntry(key, value, nbytes, expires)
+            self._table.insert(key, self._policy.add(entry))
+            self.nbytes += nbytes
+        while (self.maxsize is not None and len(self._table) > self.maxsize) or \
+                (self.maxbytes is not None and self.nbytes > self.maxbytes):
+            evicted = self._policy.evict()
+            self._table.delete(evicted.key)
+            self.nbytes -= evicted.nbytes
+            self.evictions += 1
+
+    def delete(self, key) -> None:
+        self._discard(self._table.get(key))     # KeyError if missing
+
+    def __contains__(self, key) -> bool:
+        # Doesn't count as a use, and expired entries don't count
+        try:
+            entry = self._table.get(key).data
+        except KeyError:
+            return False
+        return entry.expires is None or entry.expires > time.monotonic()
+
+    def clear(self) -> None:
+        self._policy = _POLICIES[self.policy](self.maxsize)
+        self._table = HashTable()
+        self.nbytes = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self), "nbytes": self.nbytes}
+
+_KWD_MARK = object()    # Separates positional from keyword arguments in memoize keys
+
+def memoize(cache: Optional[Cache] = None, **options):
+    ## Decorator caching a function's results, keyed by its arguments
+        # @memoize(maxsize=1024, policy="lfu", ttl=60)
+        # Arguments must be hashable; the wrapper's .cache exposes the counters
+    cache = cache if cache is not None else Cache(**options)
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            key = args + (_KWD_MARK,) + tuple(sorted(kwargs.items())) if kwargs else args
+                # The marker keeps f(1, a=2) apart from f((1,), (("a", 2),))
+            result = cache.get(key, _MISSING)
+            if result is _MISSING:
+                result = function(*args, **kwargs)
+                cache.set(key, result)
+            return result
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+### Experimenting with Cache
+# cache = Cache(maxsize=2, policy="lfu")
+# cache.set("a", 1); cache.set("b", 2)
+# cache.get("a")
+# cache.set("c", 3)     # Evicts "b", used less than "a"
+# print(cache.get("b"), cache.get("a"), cache.stats())
+# @memoize(maxsize=100)
+# def fib(n): return n if n < 2 else fib(n - 1) + fib(n - 2)
+# print(fib(80), fib.cache.stats())
+
+### Benchmarking hit-path latency
+# import timeit
+# for policy in ("lru", "lfu", "arc"):
+#     cache = Cache(maxsize=10_000, policy=policy)
+#     for i in range(10_000): cache.set(i, i)
+#     n = 1_000_000
+#     seconds = timeit.timeit("get(1234)", globals={"get": cache.get}, number=n)
+#     print(f"{policy}: {seconds / n * 1e9:.0f} ns per hit")
 
 
 
@@ -762,11 +2891,11 @@ def merge(leftArr, rightArr):
     result = []
     i = 0; j = 0
     while i < len(leftArr) and j < len(rightArr):
-        if leftArr[i] < rightArr[j]:
+        if leftArr[i] <= rightArr[j]:   # <= takes the left item on ties (stable)
             result.append(leftArr[i])
             i += 1
         else: 
-            result.append(rightArr[i])
+            result.append(rightArr[j])
             j += 1
     result.extend(leftArr[i:])
     result.extend(rightArr[j:])
@@ -781,6 +2910,144 @@ def merge_sort(arr):
     sorted_right = merge_sort(right_half)
     return merge(sorted_left, sorted_right)
 
+#### Bottom-up merge sort
+    # Iterative, so no recursion, and sorts "arr" in place
+    # Blocks of 32 are insertion sorted first, then merged in passes of
+        # width 32, 64, 128... Each pass reads one buffer and writes the other
+        # (ping-pong), so the only allocation is one auxiliary buffer of n slots
+    # Stable; key= is called on the merge heads instead of being cached,
+        # which keeps extra memory at the n auxiliary slots
+    # Works on lists, CArrays or any mutable sequence
+_MERGE_BLOCK = 32
+
+def merge_sort_bottom_up(arr, key=None):
+    n = len(arr)
+    if n <= 1: return arr
+    for low in range(0, n, _MERGE_BLOCK):
+        _insertion_sort_block(arr, low, min(low + _MERGE_BLOCK, n), key)
+    if n <= _MERGE_BLOCK: return arr
+    aux = [None] * n
+    src, dst = arr, aux
+    width = _MERGE_BLOCK
+    while width < n:
+        for low in range(0, n, 2 * width):
+            mid = min(low + width, n)
+            _merge_into(src, dst, low, mid, min(low + 2 * width, n), key)
+        src, dst = dst, src
+        width *= 2
+    if src is aux:  # Odd number of passes: result is in the buffer
+        for i in range(n): arr[i] = aux[i]
+    return arr
+
+def _insertion_sort_block(arr, low, high, key):
+    for i in range(low + 1, high):
+        item = arr[i]
+        item_key = item if key is None else key(item)
+        j = i - 1
+        while j >= low and item_key < (arr[j] if key is None else key(arr[j])):
+            arr[j + 1] = arr[j]
+            j -= 1
+        arr[j + 1] = item
+
+def _merge_into(src, dst, low, mid, high, key):
+    # Merges sorted src[low:mid] and src[mid:high] into dst[low:high]
+    i, j, k = low, mid, low
+    if i < mid and j < high:
+        left, right = src[i], src[j]
+        left_key = left if key is None else key(left)
+        right_key = right if key is None else key(right)
+        while True:
+            if right_key < left_key:    # Strict: ties take the left item (stable)
+                dst[k] = right; k += 1; j += 1
+                if j == high: break
+                right = src[j]
+                right_key = right if key is None else key(right)
+            else:
+                dst[k] = left; k += 1; i += 1
+                if i == mid: break
+                left = src[i]
+                left_key = left if key is None else key(left)
+    while i < mid:
+        dst[k] = src[i]; k += 1; i += 1
+    while j < high:
+        dst[k] = src[j]; k += 1; j += 1
+
+### Experimenting with merge_sort_bottom_up
+# data = [5, 1, 4, 2, 3] * 30
+# print(merge_sort_bottom_up(data)[:10])
+# words = CArray(4); words.copy_from(["pear", "fig", "kiwi", "apple"])
+# print(merge_sort_bottom_up(words, key=len))
+
+#### Streaming k-way merge
+    # merge_iter(*iterables) lazily merges any number of sorted iterables
+    # Inputs are pulled batch_size items at a time, so memory is
+        # O(k * batch_size) for k inputs, independent of their total length
+    # A heap (MinHeap, or MaxHeap for reverse=True) holds one
+        # (key, order, source) entry per input. The source at the root keeps
+        # emitting until its head stops beating the runner-up (the better of
+        # the root's two children) => presorted stretches cost one heap
+        # operation instead of one per item
+    # Stable: equal keys come out in the order of their iterables
+    # dedupe=True drops items whose key equals the previous item's key
+    # Output is assembled in lists of batch_size; batched=True yields those
+        # lists instead of single items
+def merge_iter(*iterables, key=None, reverse=False, dedupe=False,
+               batch_size=1024, batched=False):
+    batches = _merge_batches(iterables, key, reverse, dedupe, batch_size)
+    return batches if batched else chain.from_iterable(batches)
+
+def _merge_batches(iterables, key, reverse, dedupe, batch_size):
+    before = operator.gt if reverse else operator.lt
+    heap = MaxHeap() if reverse else MinHeap()
+    sources = []    # [buffer, position, iterator] per non-empty input
+    for order, iterable in enumerate(iterables):
+        iterator = iter(iterable)
+        buffer = list(islice(iterator, batch_size))
+        if buffer:
+            head = buffer[0] if key is None else key(buffer[0])
+            heap.push((head, -order if reverse else order, len(sources)))
+            sources.append([buffer, 0, iterator])
+    entries = heap.arr
+    pick = max if reverse else min
+    out, last = [], _MISSING
+    while entries:
+        _, order, source = entries[0]
+        buffer, position, iterator = sources[source]
+        if len(entries) > 1:
+            runner_up = entries[1] if len(entries) == 2 else pick(entries[1], entries[2])
+            bound_key, bound_order, _ = runner_up
+            wins_ties = before(order, bound_order)
+        else:
+            bound_key = _MISSING    # Last input left: no runner-up
+        while True:
+            item = buffer[position]
+            item_key = item if key is None else key(item)
+            if bound_key is not _MISSING and (before(bound_key, item_key) or
+                    not (wins_ties or before(item_key, bound_key))):
+                heap.replace((item_key, order, source))
+                sources[source][0:2] = buffer, position
+                break
+            if not (dedupe and item_key == last):
+                out.append(item)
+                if len(out) >= batch_size:
+                    yield out
+                    out = []
+            last = item_key
+            position += 1
+            if position == len(buffer):
+                buffer, position = list(islice(iterator, batch_size)), 0
+                if not buffer:
+                    heap.pop()
+                    break
+    if out: yield out
+
+### Experimenting with merge_iter
+# print(list(merge_iter([1, 4, 7], [2, 5, 8], [3, 6, 9])))
+# print(list(merge_iter([9, 5, 1], [8, 5, 2], reverse=True, dedupe=True)))
+# print(list(merge_iter(["fig", "pear"], ["kiwi", "banana"], key=len)))
+# shards = [range(i, 1_000_000, 100) for i in range(100)]
+# for batch in merge_iter(*shards, batched=True, batch_size=4096): pass
+
 
 
 
@@ -808,7 +3075,7 @@ def partition(arr, low_idx, high_idx):
     for j in range(low_idx, high_idx):
         if arr[j] <= pivot: 
             i += 1
-            arr[i], arr[j] = arr[i], arr[j]
+            arr[i], arr[j] = arr[j], arr[i]
     arr[i+1], arr[high_idx] = arr[high_idx], arr[i+1]
     return i+1
 
@@ -822,6 +3089,390 @@ def quick_sort(arr):
         else: larger.append(num)
     return quick_sort(smaller) + equal + quick_sort(larger)
 
+#### Introsort (in-place quicksort)
+    # Quicksort on top of partition(), without building new lists:
+        # pivot: median of 3 (first, middle, last), or ninther (median of
+            # 3 medians of 3) above 128 items; moved to high_idx for partition()
+        # if sampling finds equal candidates the data is likely duplicate-heavy,
+            # so partition3() (Dutch flag) groups everything equal to the pivot at once
+        # recurses into the smaller side and loops on the larger => O(log n) stack
+        # past 2*log2(n) levels of bad pivots it switches to heapsort => O(n log n) worst case
+        # slices of 16 or fewer items are finished with insertion sort
+    # Not stable
+_INTRO_SMALL = 16
+_NINTHER_LIMIT = 128
+
+def partition3(arr, low_idx, high_idx):
+    # Dutch flag partition around arr[high_idx]
+    # Returns (lt, gt): arr[low:lt] < pivot, arr[lt:gt+1] == pivot, arr[gt+1:high+1] > pivot
+    pivot = arr[high_idx]
+    lt, i, gt = low_idx, low_idx, high_idx
+    while i <= gt:
+        if arr[i] < pivot:
+            arr[lt], arr[i] = arr[i], arr[lt]
+            lt += 1; i += 1
+        elif pivot < arr[i]:
+            arr[i], arr[gt] = arr[gt], arr[i]
+            gt -= 1
+        else: i += 1
+    return lt, gt
+
+def _median3(arr, a, b, c):
+    # Index of the median of arr[a], arr[b], arr[c]
+    if arr[a] < arr[b]:
+        if arr[b] < arr[c]: return b
+        return c if arr[a] < arr[c] else a
+    if arr[a] < arr[c]: return a
+    return c if arr[b] < arr[c] else b
+
+def _choose_pivot(arr, low, high):
+    # Moves the chosen pivot to arr[high], True if the samples had duplicates
+    mid = low + (high - low) // 2
+    if high - low + 1 > _NINTHER_LIMIT:
+        step = (high - low) // 8
+        samples = (low, low + step, low + 2 * step, mid - step, mid, mid + step,
+                   high - 2 * step, high - step, high)
+        medians = [_median3(arr, *samples[i:i + 3]) for i in (0, 3, 6)]
+        pivot = _median3(arr, *medians)
+    else:
+        samples = (low, mid, high)
+        pivot = _median3(arr, *samples)
+    values = [arr[i] for i in samples]
+    duplicates = any(not (a < b or b < a) for a, b in zip(values, values[1:])) or \
+        not (values[0] < values[-1] or values[-1] < values[0])
+    arr[pivot], arr[high] = arr[high], arr[pivot]
+    return duplicates
+
+def _heapsort_range(arr, low, high):
+    # In-place heapsort of arr[low:high+1] (max-heap rooted at low)
+    n = high - low + 1
+    for start in range(n // 2 - 1, -1, -1): _sift_down(arr, low, start, n)
+    for end in range(n - 1, 0, -1):
+        arr[low], arr[low + end] = arr[low + end], arr[low]
+        _sift_down(arr, low, 0, end)
+
+def _sift_down(arr, base, root, n):
+    item = arr[base + root]
+    while True:
+        child = 2 * root + 1
+        if child >= n: break
+        if child + 1 < n and arr[base + child] < arr[base + child + 1]: child += 1
+        if not item < arr[base + child]: break
+        arr[base + root] = arr[base + child]
+        root = child
+    arr[base + root] = item
+
+def introsort(arr, low_idx=0, high_idx=None):
+    if high_idx is None: high_idx = len(arr) - 1
+    if high_idx > low_idx:
+        _introsort(arr, low_idx, high_idx, 2 * (high_idx - low_idx + 1).bit_length())
+    return arr
+
+def _introsort(arr, low, high, depth):
+    while high - low + 1 > _INTRO_SMALL:
+        if depth == 0:
+            _heapsort_range(arr, low, high)
+            return
+        depth -= 1
+        if _choose_pivot(arr, low, high):
+            lt, gt = partition3(arr, low, high)
+            left_high, right_low = lt - 1, gt + 1
+        else:
+            p = partition(arr, low, high)
+            left_high, right_low = p - 1, p + 1
+        if left_high - low < high - right_low:
+            _introsort(arr, low, left_high, depth)
+            low = right_low
+        else:
+            _introsort(arr, right_low, high, depth)
+            high = left_high
+    _insertion_sort_range(arr, low, high + 1)
+
+### Experimenting with introsort
+# data = [3, 1, 2] * 50
+# print(introsort(data)[:10])
+
+### Benchmarking quicksort worst cases
+# import random, time
+# n = 100_000
+# cases = {
+#     "random": [random.random() for _ in range(n)],
+#     "sorted": list(range(n)),
+#     "reversed": list(range(n, 0, -1)),
+#     "all equal": [7] * n,
+#     "few distinct": [random.randrange(4) for _ in range(n)],
+#     "organ pipe": list(range(n // 2)) + list(range(n // 2, 0, -1)),
+#     "sawtooth": [i % 1000 for i in range(n)],
+# }
+# for name, data in cases.items():
+#     start = time.perf_counter()
+#     introsort(list(data))
+#     print(f"{name:12} introsort {time.perf_counter() - start:.3f}s")
+
+##### Selection
+    # For when only part of the order matters (a median, the top 100 of 10M...)
+#### nth_element
+    # Introselect: quicksort's partition, but only the side holding index k
+        # is kept => O(n) expected. Same pivots as introsort (median of 3 or
+        # ninther, partition3() on duplicates); after 2*log2(n) bad pivots the
+        # remaining range is heapsorted, so the worst case is O(n log n)
+    # Afterwards arr[k] is the item a full sort would put there, with nothing
+        # larger before it and nothing smaller after it. Returns arr[k]
+def nth_element(arr, k):
+    n = len(arr)
+    if not 0 <= k < n: raise IndexError("k out of range")
+    low, high = 0, n - 1
+    depth = 2 * n.bit_length()
+    while high - low + 1 > _INTRO_SMALL:
+        if depth == 0:
+            _heapsort_range(arr, low, high)
+            return arr[k]
+        depth -= 1
+        if _choose_pivot(arr, low, high):
+            lt, gt = partition3(arr, low, high)
+        else:
+            lt = gt = partition(arr, low, high)
+        if k < lt: high = lt - 1
+        elif k > gt: low = gt + 1
+        else: return arr[k]
+    _insertion_sort_range(arr, low, high + 1)
+    return arr[k]
+
+#### Partial sort
+    # Puts the k smallest items, sorted, in arr[:k]; the rest are left in
+        # no particular order. nth_element() then introsort of the first k
+        # => O(n + k log k)
+def partial_sort(arr, k):
+    n = len(arr)
+    if k <= 0: return arr
+    if k < n: nth_element(arr, k - 1)
+    return introsort(arr, 0, min(k, n) - 1)
+
+#### Top k
+    # Streams "iterable" once, keeping only the best k so far in a bounded
+        # heap => O(n log k) time, O(k) memory
+        # largest=True: MinHeap, whose root is the weakest kept item
+        # largest=False: MaxHeap, same idea
+    # A new item replaces the root only if it's strictly better, so among
+        # equal keys the earliest ones are kept (stable). Heap entries are
+        # (key, tiebreak, item) so items themselves are never compared
+    # Returns the k items best first
+def top_k(iterable, k, key=None, largest=True):
+    if k <= 0: return []
+    iterator = iter(iterable)
+    if largest:
+        heap = MinHeap([(item if key is None else key(item), -i, item)
+                        for i, item in zip(range(k), iterator)])
+        root = heap.arr
+        for i, item in enumerate(iterator, k):
+            item_key = item if key is None else key(item)
+            if root[0][0] < item_key: heap.replace((item_key, -i, item))
+        return [entry[2] for entry in sorted(heap.arr, reverse=True)]
+    heap = MaxHeap([(item if key is None else key(item), i, item)
+                    for i, item in zip(range(k), iterator)])
+    root = heap.arr
+    for i, item in enumerate(iterator, k):
+        item_key = item if key is None else key(item)
+        if item_key < root[0][0]: heap.replace((item_key, i, item))
+    return [entry[2] for entry in sorted(heap.arr)]
+
+### Experimenting with selection
+# data = [9, 1, 8, 2, 7, 3, 6, 4, 5] * 5
+# print(nth_element(list(data), len(data) // 2))     # Median
+# print(partial_sort(list(data), 4)[:4])
+# print(top_k(data, 3), top_k(data, 3, largest=False))
+# print(top_k(["pear", "fig", "banana", "kiwi"], 2, key=len))
+
+### Benchmarking selection against a full sort
+# import random, time
+# n, k = 2_000_000, 100
+# data = [random.random() for _ in range(n)]
+# cases = {
+#     "top_k": lambda: top_k(data, k),
+#     "sorted()[-k:]": lambda: sorted(data)[-k:],
+#     "partial_sort": lambda: partial_sort(list(data), k),
+#     "introsort": lambda: introsort(list(data)),
+#     "nth_element (median)": lambda: nth_element(list(data), n // 2),
+#     "sorted()[n // 2]": lambda: sorted(data)[n // 2],
+# }
+# for name, run in cases.items():
+#     start = time.perf_counter()
+#     run()
+#     print(f"{name:22} {time.perf_counter() - start:.3f}s")
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+#### Radix sort
+    # radix_sort(arr, radix=256, key=None) sorts "arr" in place and returns it
+    # Keys are turned into non-negative ints whose order matches the keys':
+        # ints: minus the smallest key, so negatives work
+        # floats: IEEE-754 bits, with the sign bit flipped for positives and
+            # every bit flipped for negatives (-0.0 is read as 0.0)
+        # a mix of ints and floats has no exact transform: it's merge sorted
+    # Then LSD passes over digits of log2(radix) bits (any radix >= 2 works,
+        # powers of 2 use shifts instead of division):
+        # two buffers ping-pong between passes, the count list is reused,
+        # and passes where every key has the same digit are skipped
+    # Items with key= or floats are sorted as (key << index_bits) | index, so
+        # one int carries both and ties keep input order (stable)
+    # str and bytes keys are sorted MSD on utf-8 bytes, which orders like str:
+        # buckets by the byte at "depth" (shorter strings first), recursing
+        # into buckets, with sorted() for buckets of _MSD_CUTOFF or fewer.
+        # radix doesn't apply there, it's always byte-wise
+_MSD_CUTOFF = 32
+_SIGN64 = 1 << 63
+
+def radix_sort(arr, radix=256, key=None):
+    values = list(arr)
+    keys = values if key is None else list(map(key, values))
+    _write_back(arr, _radix_sorted(values, keys, radix))
+    return arr
+
+def _radix_sorted(values, keys, radix=256):
+    # Sorted copy of "values", ordered by "keys"
+    if radix < 2: raise ValueError("radix must be at least 2")
+    n = len(values)
+    if n <= 1: return list(values)
+    types = set(map(type, keys))
+    if types == {int}:
+        low = min(keys)
+        if keys is values:  # Equal ints are interchangeable: no index needed
+            return [u + low for u in _radix_lsd([k - low for k in keys], radix, 0)]
+        ukeys = [k - low for k in keys]
+    elif types == {int, float}:
+        # Mixed: floats can't hold every int (2**53 + 1, 10**400), so no bit
+            # transform is exact for both => stable comparison sort instead
+        return _sort_runs(values, keys)
+    elif types == {float}:
+        bits = memoryview(array.array('d', keys)).cast('B').cast('Q').tolist()
+        ukeys = [_SIGN64 if u == _SIGN64 else u ^ _MASK64 if u & _SIGN64 else u | _SIGN64
+                 for u in bits]
+    elif types == {str} or types == {bytes}:
+        encoded = keys if types == {bytes} else [k.encode("utf-8") for k in keys]
+        return [values[i] for i in _radix_msd(encoded)]
+    else:
+        raise TypeError(f"radix_sort needs int, float, str or bytes keys, not {types}")
+    index_bits = (n - 1).bit_length()
+    index_mask = (1 << index_bits) - 1
+    tagged = [(u << index_bits) | i for i, u in enumerate(ukeys)]
+    return [values[t & index_mask] for t in _radix_lsd(tagged, radix, index_bits)]
+
+def _radix_lsd(ukeys, radix, shift):
+    # LSD sort of non-negative ints on their bits above "shift", stable
+    n = len(ukeys)
+    high = max(ukeys) >> shift
+    power_of_2 = radix & (radix - 1) == 0
+    digit_bits, mask = radix.bit_length() - 1, radix - 1
+    src, dst = ukeys, [0] * n
+    counts, zeros = [0] * radix, [0] * radix
+    exp = 1
+    while high >= exp:
+        # Digits are recomputed in the scatter loop rather than kept in a
+            # per-pass list: the only buffers are src, dst and counts
+        if power_of_2:
+            for u in src: counts[(u >> shift) & mask] += 1
+            first = (src[0] >> shift) & mask
+        else:
+            for u in src: counts[(u >> shift) // exp % radix] += 1
+            first = (src[0] >> shift) // exp % radix
+        if counts[first] != n:      # Otherwise all digits are equal: skip
+            total = 0
+            for d in range(radix):
+                counts[d], total = total, total + counts[d]
+            if power_of_2:
+                for u in src:
+                    d = (u >> shift) & mask
+                    dst[counts[d]] = u
+                    counts[d] += 1
+            else:
+                for u in src:
+                    d = (u >> shift) // exp % radix
+                    dst[counts[d]] = u
+                    counts[d] += 1
+            src, dst = dst, src
+        counts[:] = zeros
+        if power_of_2: shift += digit_bits
+        exp *= radix    # Number of digits covered so far, for the loop test
+    return src
+
+def _radix_msd(encoded):
+    # Indices of "encoded" (bytes) in sorted order, stable
+    order = list(range(len(encoded)))
+    stack = [(0, len(order), 0)]
+    while stack:
+        low, high, depth = stack.pop()
+        if high - low <= _MSD_CUTOFF:
+            order[low:high] = sorted(order[low:high], key=encoded.__getitem__)
+            continue
+        buckets = [[] for _ in range(257)]      # Bucket 0: strings that end at depth
+        for i in order[low:high]:
+            b = encoded[i]
+            buckets[b[depth] + 1 if depth < len(b) else 0].append(i)
+        if len(buckets[0]) == high - low: continue      # All equal
+        for digit in range(1, 257):
+            if len(buckets[digit]) == high - low:       # One shared byte: skip it
+                stack.append((low, high, depth + 1))
+                break
+        else:
+            start = low
+            for digit, bucket in enumerate(buckets):
+                order[start:start + len(bucket)] = bucket
+                if digit and len(bucket) > 1:
+                    stack.append((start, start + len(bucket), depth + 1))
+                start += len(bucket)
+    return order
+
+### Experimenting with radix_sort
+# print(radix_sort([170, -45, 75, -90, 802, 24, 2, 66]))
+# print(radix_sort([3.5, -0.0, -2.25, float("inf"), 1e-300, -1e300]))
+# print(radix_sort(["banana", "apple", "", "app", "cherry"]))
+# print(radix_sort([("b", 2), ("a", 2), ("c", 1)], key=lambda pair: pair[1]))
+# print(radix_sort([329, 457, 657, 839, 436, 720, 355], radix=10))
+
+### Benchmarking radix_sort on 64-bit IDs
+# import random, time
+# n = 1_000_000
+# ids = [random.getrandbits(64) for _ in range(n)]
+# for radix in (256, 2048, 65536):
+#     start = time.perf_counter()
+#     radix_sort(list(ids), radix=radix)
+#     print(f"radix {radix:6} {time.perf_counter() - start:.3f}s")
+# start = time.perf_counter()
+# sorted(ids)
+# print(f"sorted()     {time.perf_counter() - start:.3f}s")
+
+
+
+
+
+
+
+
+
 
 
 
@@ -837,6 +3488,128 @@ def quick_sort(arr):
 
 
 
+#### Counting sort
+    # counting_sort(arr, order=None, key=None) returns a new sorted list
+    # Keys must be ints: the items themselves, or key(item) for records
+        # sorted by a small-int field. With "order", keys are the items'
+        # (or key(item)'s) positions in "order" instead
+    # One pass builds a histogram over [min, max], prefix sums turn it into
+        # each key's first slot, a second pass places the items => O(n + range),
+        # so it suits dense ranges not much wider than n. Wider ranges are
+        # handed to radix_sort() instead of allocating a huge histogram
+    # Stable. With numpy installed, inputs of _NUMPY_MIN items or more use
+        # bincount/repeat (plain ints) or a stable argsort (records) instead
+_NUMPY_MIN = 10_000
+_COUNTING_SLACK = 1024  # Ranges up to 4n + this use the histogram, wider ones radix_sort()
+
+def counting_sort(arr, order=None, key=None):
+    values = list(arr)
+    keys = values if key is None else list(map(key, values))
+    if order is not None:
+        rank = {item: i for i, item in enumerate(order)}
+        try:
+            keys = [rank[k] for k in keys]
+        except KeyError as error:
+            raise ValueError(f"{error.args[0]!r} is not in order") from None
+    if keys and set(map(type, keys)) != {int}:
+        raise TypeError("counting_sort needs int keys, use order= for other values")
+    return _counting_sorted(values, keys)
+
+def _counting_sorted(values, keys):
+    # Sorted copy of "values", ordered by the int "keys"
+    if not keys: return []
+    low, high = min(keys), max(keys)
+    if high - low > 4 * len(keys) + _COUNTING_SLACK:
+        return _radix_sorted(values, keys)  # Sparse: the histogram would dwarf the input
+    if np is not None and len(keys) >= _NUMPY_MIN and -2**63 <= low and high < 2**63:
+        array_keys = np.fromiter(keys, np.int64, len(keys))
+        if keys is values:
+            counts = np.bincount(array_keys - low, minlength=high - low + 1)
+            return np.repeat(np.arange(low, high + 1), counts).tolist()
+        return [values[i] for i in np.argsort(array_keys, kind="stable").tolist()]
+    counts = [0] * (high - low + 1)
+    for k in keys: counts[k - low] += 1
+    if keys is values:  # Equal ints are interchangeable: just expand the histogram
+        result = []
+        for offset, count in enumerate(counts):
+            if count: result.extend([offset + low] * count)
+        return result
+    total = 0
+    for i, count in enumerate(counts):
+        counts[i] = total
+        total += count
+    result = [None] * len(values)
+    for k, v in zip(keys, values):
+        result[counts[k - low]] = v
+        counts[k - low] += 1
+    return result
+
+### Experimenting with counting_sort
+# print(counting_sort([4, -2, 2, 8, 3, 3, 1]))
+# print(counting_sort(["low", "high", "mid", "low"], order=["low", "mid", "high"]))
+# print(counting_sort([("b", 2), ("a", 0), ("c", 2)], key=lambda pair: pair[1]))
+
+#### Bucket sort
+    # bucket_sort(arr, buckets=None, key=None) returns a new sorted list
+    # For numbers spread evenly over [min, max] (uniform floats):
+        # item goes to bucket int((key - min) * buckets / (max - min)),
+        # buckets are sorted with list.sort() and concatenated
+        # => O(n) expected with the default of one bucket per item
+    # Stable; infinities or NaNs fall back to sorted()
+def bucket_sort(arr, buckets=None, key=None):
+    values = list(arr)
+    keys = values if key is None else list(map(key, values))
+    if len(values) <= 1: return values
+    low, high = min(keys), max(keys)
+    span = high - low
+    if not 0 < span < float("inf"): return sorted(values, key=key)
+    count = buckets or len(values)
+    scale, last = count / span, count - 1
+    table = [[] for _ in range(count)]
+    for k, v in zip(keys, values):
+        index = int((k - low) * scale)
+        table[index if index < last else last].append(v)
+    result = []
+    for bucket in table:
+        if len(bucket) > 1: bucket.sort(key=key)
+        result.extend(bucket)
+    return result
+
+### Experimenting with bucket_sort
+# import random
+# print(bucket_sort([random.random() for _ in range(10)]))
+# print(bucket_sort([("b", 0.5), ("a", 0.25)], key=lambda pair: pair[1]))
+
+### Benchmarking counting_sort and bucket_sort against sorted()
+# import random, time
+# n = 1_000_000
+# inputs = {
+#     "counting, ints in [0, 1000)": (counting_sort, [random.randrange(1000) for _ in range(n)], None),
+#     "counting, ints in [-n, n)": (counting_sort, [random.randrange(-n, n) for _ in range(n)], None),
+#     "counting, records by field": (counting_sort, [(random.randrange(100), i) for i in range(n)],
+#                                    operator.itemgetter(0)),
+#     "bucket, uniform floats": (bucket_sort, [random.random() for _ in range(n)], None),
+# }
+# for name, (sorter, data, key) in inputs.items():
+#     start = time.perf_counter()
+#     sorter(data, key=key)
+#     middle = time.perf_counter()
+#     sorted(data, key=key)
+#     print(f"{name:28} {middle - start:.3f}s  (sorted(): {time.perf_counter() - middle:.3f}s)")
+
+
+
+
+
+
+
+
+
+
+
+
+
+
 
 
 
@@ -848,31 +3621,277 @@ def quick_sort(arr):
 
 
 
-def radix_sort(arr):
-    max_num = max(arr); exp = 1
-    while max_num // exp > 0:
-        n = len(arr)
-        output = [0] * n
-        count = [0] * 10    # Counts for digits 0-9
-            # Depends on the BASE of the numbers being analyzed
-                # Ex: base 16 => digits 0 - F => [0] * 16
-        for num in arr:
-            index = (num // exp) % 10
-                # Module depends on base of number
-            count[index] += 1
-        for i in range(1,10):
-            count[i] += count[i-1]
-        for i in range(n-1, -1, -1):
-            #Build output array
-                #Done in reverse to maintain stability
-            index = (arr[i] // exp) % 10
-            output[count[index] - 1] = arr[i]
-            count[index] -= 1
-        for i in range(n):
-            arr[i] = output[i]
-        exp *= 10   #Depends on base of number
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+##### Adaptive sort engine
+    # sort() inspects the input, then dispatches to the algorithm that suits it:
+        # "insertion": small inputs (<= 32 items), no setup cost
+        # "runs": input that's mostly ordered already (few ascending/descending runs);
+            # runs are found and merged Timsort-style, close to O(n) when presorted
+        # "counting": ints in a range not much wider than n, O(n + range)
+        # "radix": ints in a wider range (negatives too) spanning at most 32 bits,
+            # O(n * digits); past 4 byte digits the passes cost more than merging
+        # "merge": everything else, the same run merging on short runs, O(n log n)
+        # "introsort": everything else when stable=False, in-place quicksort
+    # Strategies other than introsort are stable; reverse=True keeps stability by reversing,
+        # sorting ascending, then reversing back
+    # key= is computed once per item; comparison paths sort (key, index, item)
+        # so ties never compare the items themselves
+    # The chosen strategy is recorded in sort.last_strategy
+_INSERTION_LIMIT = 32
+_MIN_RUN = 32
+_RADIX_MAX_BITS = 32   # Widest int range (in bits) worth radix sorting, 4 byte digits
+
+def sort(arr, key=None, reverse=False, stable=True):
+    values = list(arr)
+    if reverse: values.reverse()
+    keys = values if key is None else list(map(key, values))
+    strategy = _choose_strategy(keys, stable)
+    result = _STRATEGIES[strategy](values, keys)
+    if reverse: result.reverse()
+    sort.last_strategy = strategy
+    _write_back(arr, result)
     return arr
 
+sort.last_strategy = None
+
+def _choose_strategy(keys, stable):
+    n = len(keys)
+    if n <= _INSERTION_LIMIT: return "insertion"
+    descents = sum(map(operator.gt, keys, islice(keys, 1, None)))
+        # Number of places where order breaks, computed in C
+    if descents < n // _MIN_RUN or n - 1 - descents < n // _MIN_RUN:
+        return "runs"   # Mostly ascending, or mostly descending
+    if set(map(type, keys)) == {int}:
+        low, high = min(keys), max(keys)
+        if high - low <= 2 * n: return "counting"
+        if (high - low).bit_length() <= _RADIX_MAX_BITS: return "radix"
+    return "merge" if stable else "introsort"
+
+def _write_back(arr, result):
+    # Puts the sorted items back into the caller's sequence
+    if arr is result: return
+    try:
+        arr[:] = result     # list, CArray...
+    except TypeError:
+        for i, item in enumerate(result): arr[i] = item
+
+def _decorate(values, keys):
+    # (key, index, item) triples: stable, and items are never compared
+    if keys is values: return values
+    return list(zip(keys, range(len(keys)), values))
+
+def _undecorate(items, values, keys):
+    if keys is values: return items
+    return [item[2] for item in items]
+
+#### Strategies
+def _sort_insertion(values, keys):
+    items = _decorate(values, keys)
+    _insertion_sort_range(items, 0, len(items))
+    return _undecorate(items, values, keys)
+
+def _sort_runs(values, keys):
+    items = _decorate(values, keys)
+    _merge_runs(items)
+    return _undecorate(items, values, keys)
+
+def _sort_introsort(values, keys):
+    items = _decorate(values, keys)
+    introsort(items)
+    return _undecorate(items, values, keys)
+
+def _sort_radix(values, keys):
+    return _radix_sorted(values, keys)
+
+_STRATEGIES = {"insertion": _sort_insertion, "counting": _counting_sorted,
+               "radix": _sort_radix, "runs": _sort_runs, "merge": _sort_runs,
+               "introsort": _sort_introsort}
+
+#### Run merging (Timsort-style)
+def _insertion_sort_range(a, low, high):
+    # Stable insertion sort of a[low:high]
+    for i in range(low + 1, high):
+        item = a[i]
+        j = i - 1
+        while j >= low and item < a[j]:
+            a[j + 1] = a[j]
+            j -= 1
+        a[j + 1] = item
+
+def _merge_adjacent(a, low, mid, high):
+    # Merges sorted a[low:mid] and a[mid:high] in place, using a copy of the left run
+    left = a[low:mid]
+    i, j, k = 0, mid, low
+    n_left = len(left)
+    while i < n_left and j < high:
+        if a[j] < left[i]:      # Strict: equal items keep the left one first
+            a[k] = a[j]; j += 1
+        else:
+            a[k] = left[i]; i += 1
+        k += 1
+    a[k:k + n_left - i] = left[i:]  # Leftovers from the right run are already in place
+
+def _merge_runs(a):
+    # Finds natural runs, pads short ones to _MIN_RUN, merges them with a run stack
+    n = len(a)
+    runs = []   # (start, length)
+    start = 0
+    while start < n:
+        end = start + 1
+        if end < n and a[end] < a[start]:
+            # Strictly descending run: reverse it (strict keeps it stable)
+            while end < n and a[end] < a[end - 1]: end += 1
+            a[start:end] = a[start:end][::-1]
+        else:
+            while end < n and not a[end] < a[end - 1]: end += 1
+        if end - start < _MIN_RUN:
+            forced = min(n, start + _MIN_RUN)
+            _insertion_sort_range(a, start, forced)
+            end = forced
+        runs.append((start, end - start))
+        # Timsort's invariants keep merges balanced: |X| > |Y| + |Z| and |Y| > |Z|
+        while len(runs) > 1:
+            if len(runs) > 2 and runs[-3][1] <= runs[-2][1] + runs[-1][1]:
+                if runs[-3][1] < runs[-1][1]: _collapse(a, runs, len(runs) - 3)
+                else: _collapse(a, runs, len(runs) - 2)
+            elif runs[-2][1] <= runs[-1][1]:
+                _collapse(a, runs, len(runs) - 2)
+            else:
+                break
+        start = end
+    while len(runs) > 1: _collapse(a, runs, len(runs) - 2)
+
+def _collapse(a, runs, i):
+    # Merges runs[i] with runs[i + 1]
+    (low, n1), (mid, n2) = runs[i], runs[i + 1]
+    _merge_adjacent(a, low, mid, mid + n2)
+    runs[i:i + 2] = [(low, n1 + n2)]
+
+### Experimenting with sort
+# data = [5, 3, 9, 1, 3] * 20
+# print(sort(data, reverse=True)[:5], sort.last_strategy)
+# print(sort(["pear", "fig", "apple"] * 20, key=len)[:3], sort.last_strategy)
+
+### Benchmarking strategies across input distributions
+# import random, time
+# n = 200_000
+# inputs = {
+#     "random ints": [random.randrange(n * 100) for _ in range(n)],
+#     "narrow ints": [random.randrange(1000) for _ in range(n)],
+#     "sorted": list(range(n)),
+#     "nearly sorted": [i + random.randrange(5) for i in range(n)],
+#     "reversed": list(range(n, 0, -1)),
+#     "64-bit IDs": [random.getrandbits(64) for _ in range(n)],
+#     "random floats": [random.random() for _ in range(n)],
+#     "strings": [str(random.random()) for _ in range(n)],
+# }
+# for name, data in inputs.items():
+#     start = time.perf_counter()
+#     sort(list(data))
+#     middle = time.perf_counter()
+#     sorted(data)
+#     print(f"{name:14} {sort.last_strategy:9} {middle - start:.3f}s  (sorted(): {time.perf_counter() - middle:.3f}s)")
+
+##### Parallel sort
+    # Splits "arr" into one chunk per worker, sorts the chunks in a process
+        # pool with sort(), then k-way merges the sorted runs with merge_iter()
+    # Numeric data (ints that fit in 64 bits, floats, typed CArrays) is copied
+        # once into a shared_memory block and workers sort their slice of it in
+        # place => only (name, format, low, high) is pickled, never the items
+    # Anything else, or key=, sends pickled chunks (key has to be picklable,
+        # i.e. a module-level function, not a lambda)
+    # Below _PARALLEL_MIN items, or with one worker, it's just sort():
+        # starting processes costs more than it saves there
+    # Stable: merge_iter() resolves ties in favour of earlier chunks
+_PARALLEL_MIN = 100_000
+
+def parallel_sort(arr, workers=None, key=None):
+    n = len(arr)
+    workers = min(workers or os.cpu_count() or 1, n)
+    if workers <= 1 or n < _PARALLEL_MIN: return sort(arr, key=key)
+    bounds = [n * w // workers for w in range(workers + 1)]
+    code = None if key is not None else _shared_format(arr)
+    with ProcessPoolExecutor(workers) as pool:
+        if code is None:
+            values = list(arr)
+            chunks = (values[low:high] for low, high in zip(bounds, bounds[1:]))
+            runs = list(pool.map(_sort_chunk, chunks, repeat(key)))
+        else:
+            runs = _parallel_sort_shared(pool, arr, code, bounds)
+    _write_back(arr, list(merge_iter(*runs, key=key)))
+    return arr
+
+def _shared_format(arr):
+    # Struct code to share "arr" under, None if it isn't numeric
+    if isinstance(arr, CArray): return None if arr._dtype is None else _DTYPES[arr._dtype][2]
+    types = set(map(type, arr))
+    if types == {float}: return 'd'
+    if types == {int} and -2**63 <= min(arr) and max(arr) < 2**63: return 'q'
+    return None
+
+def _parallel_sort_shared(pool, arr, code, bounds):
+    n = bounds[-1]
+    shm = shared_memory.SharedMemory(create=True, size=n * struct.calcsize(code))
+    view = shm.buf.cast(code)
+    try:
+        view[:] = arr.as_memoryview() if isinstance(arr, CArray) else array.array(code, arr)
+        list(pool.map(_sort_shared_chunk, repeat(shm.name), repeat(code), bounds, bounds[1:]))
+        return [view[low:high].tolist() for low, high in zip(bounds, bounds[1:])]
+    finally:
+        view.release()
+        shm.close()
+        shm.unlink()
+
+def _sort_chunk(chunk, key):
+    # Worker: sorts a pickled chunk
+    return sort(chunk, key=key)
+
+def _sort_shared_chunk(name, code, low, high):
+    # Worker: sorts view[low:high] of the shared block in place
+    shm = shared_memory.SharedMemory(name=name)
+    view = shm.buf.cast(code)
+    try:
+        view[low:high] = array.array(code, sort(view[low:high].tolist()))
+    finally:
+        view.release()
+        shm.close()
+
+### Experimenting with parallel_sort
+# if __name__ == "__main__":     # Needed where workers are spawned (Windows, macOS)
+#     import random
+#     data = [random.randrange(10**9) for _ in range(500_000)]
+#     print(parallel_sort(data, workers=4)[:5])
+#     print(parallel_sort(["pear", "fig", "kiwi"] * 50_000, workers=2, key=len)[:3])
+
+### Benchmarking parallel_sort scaling
+# if __name__ == "__main__":
+#     import random, time
+#     n = 4_000_000
+#     inputs = {"ints": [random.randrange(n * 100) for _ in range(n)],
+#               "floats": [random.random() for _ in range(n)],
+#               "strings": [str(random.random()) for _ in range(n // 4)]}
+#     for name, data in inputs.items():
+#         for workers in (1, 2, 4, 8, 16):
+#             start = time.perf_counter()
+#             parallel_sort(list(data), workers=workers)
+#             print(f"{name:8} {workers:2} workers {time.perf_counter() - start:.3f}s")
 
 
 
@@ -894,19 +3913,186 @@ def radix_sort(arr):
 
 
 
+##### External sort
+    # Sorts a text file bigger than memory, one record per line:
+        # 1. Reads lines until the run holds memory_limit // 2 bytes (sort()
+            # makes a second list of the run), sorts it with sort() and spills
+            # it to a temporary file. With key=, each record also counts its
+            # key and the (key, index, item) decoration sort() builds for it
+        # 2. k-way merges the runs with a MinHeap of (key, run, record), reading
+            # each run through its own buffer. With more runs than the fan-in,
+            # extra passes merge groups of runs into longer runs first
+    # Run files are length-prefixed utf-8 records (4-byte length + bytes), so
+        # records can hold anything except the newline that ends them
+    # Output lines end with "\n"; key= gets each line without its newline
+    # Memory stays within memory_limit: runs are capped, and a merge holds one
+        # record per open run plus read buffers sharing memory_limit // 2
+    # Stable: ties go to the earlier run, and runs are in input order
+    # progress(stats) is called after every spilled run, every merge pass and
+        # every _PROGRESS_EVERY merged records
+_RUN_LENGTH = struct.Struct("<I")
+_MERGE_BUFFER = 64 * 1024       # Smallest read buffer per run while merging
+_MAX_FAN_IN = 128               # Cap on open run files in one merge
+_PROGRESS_EVERY = 100_000
+_DECORATION_COST = 136  # Per record, sort() with key=: keys slot, (key, index, item)
+                        # triple, its index int, decorated and result list slots
 
+class ExternalSortStats:
+    def __init__(self):
+        self.phase = "runs"         # "runs", "merge" then "done"
+        self.records = 0            # Records read from the input
+        self.records_merged = 0     # Records written by the current merge pass
+        self.runs = 0               # Run files written, including merged ones
+        self.merge_passes = 0
+        self.bytes_read = 0         # Input plus run files
+        self.bytes_written = 0      # Run files plus output
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def _tick(self):
+        self.elapsed = time.perf_counter() - self.started
+
+    def read_throughput(self) -> float:
+        ## Megabytes read per second
+        return self.bytes_read / 1e6 / self.elapsed if self.elapsed else 0.0
+
+    def write_throughput(self) -> float:
+        ## Megabytes written per second
+        return self.bytes_written / 1e6 / self.elapsed if self.elapsed else 0.0
+
+    def __repr__(self):
+        return (f"ExternalSortStats(phase={self.phase!r}, records={self.records}, "
+                f"runs={self.runs}, merge_passes={self.merge_passes}, "
+                f"read={self.read_throughput():.1f}MB/s, "
+                f"write={self.write_throughput():.1f}MB/s, elapsed={self.elapsed:.2f}s)")
+
+def external_sort(input_path, output_path, memory_limit, key=None,
+                  progress=None, tmp_dir=None, encoding="utf-8"):
+    if memory_limit < 4 * _MERGE_BUFFER:
+        raise ValueError(f"memory_limit must be at least {4 * _MERGE_BUFFER} bytes")
+    stats = ExternalSortStats()
+    fan_in = max(2, min(_MAX_FAN_IN, memory_limit // 2 // _MERGE_BUFFER - 1))
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as work_dir:
+        runs, last_run = _spill_runs(input_path, work_dir, memory_limit // 2,
+                                     key, encoding, stats, progress)
+        stats.phase = "merge"
+        if not runs:    # Everything fit in memory: no merge needed
+            with open(output_path, "wb", buffering=_MERGE_BUFFER) as output:
+                _write_lines(output, last_run, encoding, stats)
+        else:
+            while len(runs) > fan_in:
+                runs = [group[0] if len(group) == 1 else
+                        _merge_to_run(group, work_dir, memory_limit, key, encoding, stats, progress)
+                        for group in (runs[i:i + fan_in] for i in range(0, len(runs), fan_in))]
+                stats.merge_passes += 1
+                stats._tick()
+                if progress: progress(stats)
+            with open(output_path, "wb", buffering=_MERGE_BUFFER) as output:
+                merged = _merge_run_files(runs, memory_limit, key, encoding, stats, progress)
+                _write_lines(output, merged, encoding, stats)
+            stats.merge_passes += 1
+    stats.phase = "done"
+    stats._tick()
+    if progress: progress(stats)
+    return stats
+
+def _spill_runs(input_path, work_dir, run_limit, key, encoding, stats, progress):
+    # Sorted run files, in input order. If the whole input fits in one run it
+        # isn't spilled: returns ([], sorted records) instead
+    runs, run, run_bytes = [], [], 0
+    with open(input_path, "rb", buffering=_MERGE_BUFFER) as source:
+        for line in source:
+            stats.bytes_read += len(line)
+            record = (line[:-1] if line.endswith(b"\n") else line).decode(encoding)
+            run.append(record)
+            stats.records += 1
+            run_bytes += sys.getsizeof(record) + 8     # Record plus its list slot
+            if key is not None:
+                run_bytes += sys.getsizeof(key(record)) + _DECORATION_COST
+            if run_bytes >= run_limit:
+                runs.append(_spill(sort(run, key=key), work_dir, encoding, stats))
+                run, run_bytes = [], 0
+                stats._tick()
+                if progress: progress(stats)
+    sort(run, key=key)
+    if not runs: return runs, run
+    if run: runs.append(_spill(run, work_dir, encoding, stats))
+    return runs, None
+
+def _spill(run, work_dir, encoding, stats):
+    path = os.path.join(work_dir, f"run{stats.runs}.bin")
+    stats.runs += 1
+    with open(path, "wb", buffering=_MERGE_BUFFER) as output:
+        _write_run(output, run, encoding, stats)
+    return path
+
+def _merge_to_run(paths, work_dir, memory_limit, key, encoding, stats, progress):
+    # Merges a group of run files into one longer run, for multi-pass merges
+    merged = _merge_run_files(paths, memory_limit, key, encoding, stats, progress)
+    path = _spill(merged, work_dir, encoding, stats)
+    for run in paths: os.remove(run)
+    return path
+
+def _write_run(output, records, encoding, stats):
+    for record in records:
+        data = record.encode(encoding)
+        output.write(_RUN_LENGTH.pack(len(data)))
+        output.write(data)
+        stats.bytes_written += _RUN_LENGTH.size + len(data)
+
+def _write_lines(output, records, encoding, stats):
+    for record in records:
+        data = record.encode(encoding) + b"\n"
+        output.write(data)
+        stats.bytes_written += len(data)
+
+def _read_run(path, buffer_size, encoding, stats):
+    # Streams the records of one run file through a "buffer_size" read buffer
+    with open(path, "rb", buffering=buffer_size) as source:
+        while True:
+            header = source.read(_RUN_LENGTH.size)
+            if not header: return
+            (length,) = _RUN_LENGTH.unpack(header)
+            stats.bytes_read += _RUN_LENGTH.size + length
+            yield source.read(length).decode(encoding)
+
+def _merge_run_files(paths, memory_limit, key, encoding, stats, progress):
+    # Yields the records of the sorted run files "paths" in order
+    buffer_size = max(_MERGE_BUFFER, memory_limit // 2 // (len(paths) + 1))
+    readers = [_read_run(path, buffer_size, encoding, stats) for path in paths]
+    heap = MinHeap()
+    for index, reader in enumerate(readers):
+        for record in reader:
+            heap.push((record if key is None else key(record), index, record))
+            break
+    stats.records_merged = 0
+    while heap:
+        _, index, record = heap.peek()
+        yield record
+        stats.records_merged += 1
+        if progress and stats.records_merged % _PROGRESS_EVERY == 0:
+            stats._tick()
+            progress(stats)
+        for following in readers[index]:
+            heap.replace((following if key is None else key(following), index, following))
+            break
+        else:
+            heap.pop()
 
-def counting_sort(arr, order: []):
-    n = len(arr); count = {}; output = [0] * n
-    for item in order: count[item] = 0  #Initialize dict
-    for item in arr: count[item] += 1   #Fill in frquencies
-    for i in range(1,len(order)):   #Freq -> counts
-        count[order[i]] += count[order[i-1]]
-    for i in range(n-1, -1, -1):
-        index = count[arr[i]] - 1
-        output[index] = arr[i]
-        count[arr[i]] -+ 1
-    return output
+### Experimenting with external_sort
+# import random
+# with open("unsorted.txt", "w") as f:
+#     for _ in range(200_000): f.write(f"{random.random()}\n")
+# print(external_sort("unsorted.txt", "sorted.txt", memory_limit=1_000_000,
+#                     progress=lambda stats: print(stats)))
+
+### Benchmarking external_sort against memory_limit
+# import random, time
+# with open("unsorted.txt", "w") as f:
+#     for _ in range(2_000_000): f.write(f"{random.random()}\n")
+# for memory_limit in (256 * 1024, 4 * 1024**2, 64 * 1024**2, 1024**3):
+#     stats = external_sort("unsorted.txt", "sorted.txt", memory_limit)
+#     print(f"{memory_limit:>12} bytes {stats}")
 
 
 
@@ -977,7 +4163,7 @@ def linear_search(arr, target):
 #### Binary search
 ### Recursive
 def binary_search_rec(arr, target, left, right):
-    if left < right: return -1
+    if left > right: return -1
     mid = left + (right - left)//2
     if arr[mid] == target: return mid
     elif arr[mid] < target:
@@ -994,6 +4180,66 @@ def binary_search_iter(arr, target):
         else: right = mid - 1
     return -1
 
+#### Bounds (bisect-based)
+    # Positions in a sorted "arr" (list, CArray...), searched by the C bisect
+        # module, optionally within arr[low:high]
+    # With key=, arr is ordered by key(item) and "target" is a key, not an item
+    # lower_bound: first index whose item is >= target
+    # upper_bound: first index whose item is > target
+    # equal_range: (lower_bound, upper_bound), the slice of items equal to target
+def lower_bound(arr, target, key=None, low=0, high=None):
+    return bisect.bisect_left(arr, target, low, len(arr) if high is None else high, key=key)
+
+def upper_bound(arr, target, key=None, low=0, high=None):
+    return bisect.bisect_right(arr, target, low, len(arr) if high is None else high, key=key)
+
+def equal_range(arr, target, key=None, low=0, high=None):
+    start = lower_bound(arr, target, key, low, high)
+    return start, upper_bound(arr, target, key, start, high)
+
+#### Batched search
+    # search_sorted(arr, targets, side) returns, for each target, the index
+        # where it would be inserted into the sorted "arr" to keep it sorted:
+        # before equal items for side="left", after them for side="right"
+    # Targets are visited in sorted order, so each search starts where the
+        # previous one ended: the window only shrinks, and duplicate targets
+        # reuse the last answer
+    # Typed CArrays go through numpy.searchsorted when numpy is installed
+    # Results come back in the order of "targets"
+def search_sorted(arr, targets, side="left", key=None):
+    if side not in ("left", "right"):
+        raise ValueError("side must be 'left' or 'right'")
+    targets = list(targets)
+    if np is not None and key is None and isinstance(arr, CArray) and arr._dtype is not None:
+        return np.searchsorted(np.asarray(arr.as_memoryview()), targets, side=side).tolist()
+    search = bisect.bisect_left if side == "left" else bisect.bisect_right
+    result = [0] * len(targets)
+    low, high, previous = 0, len(arr), _MISSING
+    for i in sorted(range(len(targets)), key=targets.__getitem__):
+        target = targets[i]
+        if target != previous:
+            low = search(arr, target, low, high, key=key)
+            previous = target
+        result[i] = low
+    return result
+
+### Experimenting with bounds and search_sorted
+# data = [1, 3, 3, 3, 7, 9]
+# print(lower_bound(data, 3), upper_bound(data, 3), equal_range(data, 3))
+# print(search_sorted(data, [9, 0, 3, 8], side="right"))
+# people = [("ann", 21), ("bob", 34), ("eve", 34)]
+# print(equal_range(people, 34, key=lambda person: person[1]))
+
+### Benchmarking search_sorted against one search per target
+# import random, time
+# index = sorted(random.randrange(10**12) for _ in range(1_000_000))
+# timestamps = [random.randrange(10**12) for _ in range(200_000)]
+# start = time.perf_counter()
+# search_sorted(index, timestamps)
+# middle = time.perf_counter()
+# [binary_search_iter(index, t) for t in timestamps]
+# print(f"search_sorted {middle - start:.3f}s  (binary_search_iter: {time.perf_counter() - middle:.3f}s)")
+
 
 
 
@@ -1032,7 +4278,9 @@ def binary_search_iter(arr, target):
 
 ##### Trees
 #### Binary Trees
-class Node:
+class TreeNode:
+    __slots__ = ("data", "left", "right")
+
     def __init__(self, data):
         self.data = data
         self.left = None
@@ -1044,16 +4292,16 @@ class BinTree:
         self.root = None
 
     def insert(self, root, value):
-        if root is None: return Node(value)
+        if root is None: return TreeNode(value)
         queue = deque([root])
         while queue:
             temp = queue.popleft()
             if temp.left is None: 
-                temp.left = Node(value)
+                temp.left = TreeNode(value)
                 return root
             else: queue.append(temp.left)
             if temp.right is None: 
-                temp.right = Node(value)
+                temp.right = TreeNode(value)
                 return root
             else: queue.append(temp.right)
         return root
@@ -1122,7 +4370,9 @@ class BinTree:
 
 
 #### Binary Search Trees
-class Node:
+class BSTNode:
+    __slots__ = ("value", "left", "right")
+
     def __init__(self, data):
         self.value = data
         self.left = None
@@ -1133,7 +4383,7 @@ class BST:
         self.root = None
     
     def insert(self, root, value):
-        if root is None: return Node(value)
+        if root is None: return BSTNode(value)
         if root.value == value: return root
             # No duplicates allowed
         if root.value < value: root.right = self.insert(root.right, value)
@@ -1193,7 +4443,9 @@ class BST:
 
 
 #### AVL trees
-class Node:
+class AVLNode:
+    __slots__ = ("value", "left", "right", "height")
+
     def __init__(self, value):
         self.value = value
         self.left = None
@@ -1236,7 +4488,7 @@ class AVLTrees:
         return curr
     
     def insert(self, root, value):
-        if not root: return Node(value)
+        if not root: return AVLNode(value)
         elif value < root.value: root.left = self.insert(root.left, value)
         else: root.right = self.insert(root.right, value)
         root.height = 1 + max(self.height(root.left), self.height(root.right))
@@ -1271,7 +4523,7 @@ class AVLTrees:
             root.value = temp.value
             root.right = self.delete(root.right, temp.value)
         if not root: return root
-        root.hieght = 1 + max(self.height(root.left), self.height(root.right))
+        root.height = 1 + max(self.height(root.left), self.height(root.right))
         balance = self.balance(root)
         ##Rotation cases
         if balance > 1 and value < root.left.value: #Right rotate
@@ -1290,6 +4542,20 @@ class AVLTrees:
         if not root or root.value == value: return root
         if root.value < value: return self.search(root.right, value)
         return self.search(root.left, value)
+
+### Benchmarking bytes per node (plain class vs __slots__)
+    # After the AVL section, so that every node class is defined
+# import tracemalloc
+# class DictNode:     # ListNode as it was before __slots__
+#     def __init__(self, data):
+#         self.data = data
+#         self.next = None
+# for node_class in (DictNode, ListNode, DoubleNode, TreeNode, AVLNode):
+#     tracemalloc.start()
+#     nodes = [node_class(None) for _ in range(1_000_000)]
+#     used = tracemalloc.get_traced_memory()[0] - sys.getsizeof(nodes)
+#     tracemalloc.stop()
+#     print(f"{node_class.__name__:10} {used / len(nodes):.0f} bytes per node")
     
 
 
@@ -1321,10 +4587,19 @@ class AVLTrees:
 
 
 #### Max heaps
+    # arr is a list in heap order: arr[i] >= its children arr[2i+1], arr[2i+2]
+    # Building from a list heapifies it in place, O(n)
+    # push/pop/replace keep heap order by sifting a single path, O(log n)
+    # Items only need "<", so (key, tiebreak, item) tuples work for keyed ordering
 class MaxHeap:
-    def __init__(self, arr = []):
-        self.arr=arr
-        self.num_nodes = len(arr)
+    def __init__(self, arr=None):
+        self.arr = [] if arr is None else arr
+        self.full_heapify(0)
+
+    @property
+    def num_nodes(self): return len(self.arr)
+
+    def __len__(self): return len(self.arr)
 
     def parent(self, index): return (index - 1)//2
 
@@ -1340,49 +4615,121 @@ class MaxHeap:
     def is_max_heap(self, idx):
         # Checks if "index" subtree is max_heap
         if self.is_leaf(idx): return True
-        if self.arr[idx] < self.arr[self.left_child(idx)] or\
-                self.arr[index]<self.arr[self.right_child(idx)]:
+        left, right = self.left_child(idx), self.right_child(idx)
+        if self.arr[idx] < self.arr[left] or\
+                (right < self.num_nodes and self.arr[idx] < self.arr[right]):
             return False
-        return self.is_max_heap(self.left_child(idx)) and self.is_max_heap(self.right_child(idx))
+        return self.is_max_heap(left) and \
+            (right >= self.num_nodes or self.is_max_heap(right))
     
     def mini_heapify(self, idx):
-        if not self.is_leaf(idx):
-            largest = idx
-            if self.arr[largest] < self.arr[self.left_child(idx)]:
-                largest = self.left_child(idx)
-            if self.arr[self.arr] < self.arr[self.right_child(idx)]:
-                largest = self.right_child(idx)
-            if largest != idx: self.swap(idx,largest)
-
-    def full_heapify(self, idx):
-        self.mini_heapify(idx)
-        self.full_heapify(self.left_child(idx))
-        self.full_heapify(self.right_child(idx))
-
-    def search_max(self, idx):
+        # Sifts arr[idx] down until it's larger than both children
+        n = len(self.arr)
+        item = self.arr[idx]
+        while True:
+            child = self.left_child(idx)
+            if child >= n: break
+            if child + 1 < n and self.arr[child] < self.arr[child + 1]: child += 1
+            if not item < self.arr[child]: break
+            self.arr[idx] = self.arr[child]
+            idx = child
+        self.arr[idx] = item
+
+    def full_heapify(self, idx=0):
+        # Bottom-up heap construction of everything below "idx"
+        for i in range(self.num_nodes // 2 - 1, idx - 1, -1): self.mini_heapify(i)
+
+    def _sift_up(self, idx):
+        item = self.arr[idx]
+        while idx > 0:
+            parent = self.parent(idx)
+            if not self.arr[parent] < item: break
+            self.arr[idx] = self.arr[parent]
+            idx = parent
+        self.arr[idx] = item
+
+    def search_max(self, idx=0):
         if not self.is_max_heap(idx):
             self.full_heapify(idx)
         return self.arr[idx]
     
     def insert(self, value):
         self.arr.append(value)
-        if not self.is_max_heap(0):
-            self.full_heapify(0)
-        last_added_idx = -1
-        while self.arr[last_added_idx] > self.arr[self.parent(last_added_idx)]:
-            self.swap(last_added_idx, self.parent(last_added_idx))
-            last_added_idx = self.parent(last_added_idx)
+        self._sift_up(len(self.arr) - 1)
+
+    push = insert
+
+    def peek(self):
+        if not self.arr: raise IndexError("peek at an empty heap")
+        return self.arr[0]
+
+    def pop(self):
+        if not self.arr: raise IndexError("pop from an empty heap")
+        last = self.arr.pop()
+        if not self.arr: return last
+        top, self.arr[0] = self.arr[0], last
+        self.mini_heapify(0)
+        return top
+
+    def replace(self, value):
+        ## Pops the largest item and pushes "value", in one sift
+        if not self.arr: raise IndexError("replace on an empty heap")
+        top, self.arr[0] = self.arr[0], value
+        self.mini_heapify(0)
+        return top
 
     def delete_idx(self, idx):
         if idx >= self.num_nodes: raise IndexError
-        self.arr = self.att[:ix] + self.arr[idx+1:]
-        self.full_heapify(0)
+        last = self.arr.pop()
+        if idx == len(self.arr): return
+        self.arr[idx] = last
+        self.mini_heapify(idx)
+        self._sift_up(idx)
     
     def delete_val(self, value):
         for i, val in enumerate(self.arr):
             if val == value: return self.delete_idx(i)
         raise ValueError
 
+### Experimenting with MaxHeap
+# heap = MaxHeap([3, 9, 2, 7])
+# heap.push(5)
+# print(heap.pop(), heap.replace(1), heap.peek(), len(heap), heap.is_max_heap(0))
+
+#### Min heaps
+    # heapq-backed: arr is a plain list kept in heap order, smallest at arr[0]
+    # Items only need "<", so (key, tiebreak, item) tuples work for keyed ordering
+class MinHeap:
+    def __init__(self, arr=None):
+        self.arr = [] if arr is None else list(arr)
+        heapq.heapify(self.arr)
+
+    def __len__(self): return len(self.arr)
+
+    def push(self, value): heapq.heappush(self.arr, value)
+
+    def pop(self):
+        if not self.arr: raise IndexError("pop from an empty heap")
+        return heapq.heappop(self.arr)
+
+    def peek(self):
+        if not self.arr: raise IndexError("peek at an empty heap")
+        return self.arr[0]
+
+    def replace(self, value):
+        ## Pops the smallest item and pushes "value", in one sift
+        if not self.arr: raise IndexError("replace on an empty heap")
+        return heapq.heapreplace(self.arr, value)
+
+    def pushpop(self, value):
+        ## Pushes "value" and pops the smallest item, in one sift
+        return heapq.heappushpop(self.arr, value)
+
+### Experimenting with MinHeap
+# heap = MinHeap([5, 1, 4])
+# heap.push(2)
+# print(heap.pop(), heap.replace(3), heap.peek(), len(heap))
+
 
 
 